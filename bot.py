@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
 from config.settings import BOT_PREFIX, INTENTS, DISCORD_BOT_TOKEN, ERROR_CHANNEL_ID
+from utils.codeforces_api import CodeforcesAPI
+from repositories.user_repo import UserRepo
 import traceback
 
 from keep_alive import keep_alive
@@ -13,11 +15,20 @@ class CPBot(commands.Bot):
         super().__init__(command_prefix=BOT_PREFIX, intents=INTENTS)
     
     async def setup_hook(self):
-        """Load all cogs"""
+        """Open the database and Codeforces session, start filling the problem set pool and load all cogs"""
+        UserRepo.db.open()
+        await CodeforcesAPI.start_session()
+        CodeforcesAPI.problem_sets.warm()
         await self.load_extension('cogs.authentication')
         await self.load_extension('cogs.problems')
         await self.load_extension('cogs.duels')
         await self.load_extension('cogs.rounds')
+
+    async def close(self):
+        """Close the Codeforces session and the database before shutting down"""
+        await CodeforcesAPI.close_session()
+        UserRepo.db.close()
+        await super().close()
     
     async def on_ready(self):
         print(f'{self.user} has connected to Discord!')
@@ -66,7 +66,7 @@ class Authentication(commands.Cog):
     @commands.command(name='status')
     async def status(self, ctx):
         """Check your linked CF handle"""
-        cf_handle = AuthService.get_status(ctx.author.id)
+        cf_handle = await AuthService.get_status(ctx.author.id)
 
         embed = discord.Embed(title="📊 Status", color=discord.Color.blue())
 
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from services.duel_service import DuelService
 from utils.embeds import EmbedBuilder
+from utils.tag_query import parse_tags, TAG_SYNTAX
 
 
 class Duels(commands.Cog):
@@ -37,19 +38,29 @@ class Duels(commands.Cog):
             converter=int,
             default=10,
             description="Time per problem",
-        ) 
+        ),
+        tags: str = commands.parameter(
+            default=None,
+            description=f"Tag filter: {TAG_SYNTAX}",
+        )
     ):
         """
         Challenge another user to a duel
-        ;challenge @user <n> <low> <high> <t>
+        ;challenge @user <n> <low> <high> <t> <tags>
         """
-        error = DuelService.validate_challenge(
+        error = await DuelService.validate_challenge(
             ctx.author.id, opponent.id, opponent.bot, n, low, high
         )
         if error:
             await ctx.send(embed=EmbedBuilder.error(error))
             return
 
+        try:
+            tag_query = parse_tags(tags)
+        except ValueError as e:
+            await ctx.send(embed=EmbedBuilder.error(str(e)))
+            return
+
         if self.duel_service.repo.is_user_in_duel(ctx.author.id) or \
            self.duel_service.repo.is_user_in_duel(opponent.id):
             await ctx.send(embed=EmbedBuilder.error("One of you is already in an active duel!"))
@@ -57,12 +68,14 @@ class Duels(commands.Cog):
 
         await ctx.send("⏳ Generating problems...")
         duel = await self.duel_service.create_challenge(
-            ctx.author.id, opponent.id, n, low, high, t
+            ctx.author.id, opponent.id, n, low, high, t, tag_query
         )
 
         if not duel:
             await ctx.send(embed=EmbedBuilder.error(
                 "Not enough problems found in the specified rating range!"
+                if tag_query is None else
+                f"Not enough problems with tags `{tag_query}` found in the specified rating range!"
             ))
             return
 
@@ -74,6 +87,8 @@ class Duels(commands.Cog):
         embed.add_field(name="Problems", value=n, inline=True)
         embed.add_field(name="Rating Range", value=f"{low} - {high}", inline=True)
         embed.add_field(name="Time per Problem", value=f"{t} minutes", inline=True)
+        if tag_query is not None:
+            embed.add_field(name="Tags", value=f"`{tag_query}`", inline=True)
         embed.set_footer(text=f"{opponent.name}, use ';accept' to accept the challenge!")
         await ctx.send(embed=embed)
 
@@ -1,8 +1,10 @@
+import re
 import discord
 from discord.ext import commands
 from services.problem_service import ProblemService
 from utils.codeforces_api import CodeforcesAPI
 from utils.embeds import EmbedBuilder
+from utils.tag_query import parse_tags, TAG_SYNTAX
 
 
 class Problems(commands.Cog):
@@ -15,14 +17,25 @@ class Problems(commands.Cog):
     async def suggest_problem(self, ctx, rating:int = commands.parameter(
         description = "Desired problem rating.",
         default = -1
+    ), tags: str = commands.parameter(
+        description = f"Tag filter: {TAG_SYNTAX}.",
+        default = None
     )):
-        """Suggest a random problem near the given rating"""
+        """Suggest a random problem near the given rating
+        ;suggest <rating> <tags>
+        """
         if rating != -1 and not str(rating).lstrip('-').isdigit():
             await ctx.send(embed=EmbedBuilder.error("Please provide a valid numeric rating!"))
             return
+
+        try:
+            tag_query = parse_tags(tags)
+        except ValueError as e:
+            await ctx.send(embed=EmbedBuilder.error(str(e)))
+            return
         
         resolved_rating = None if rating == -1 else int(rating)
-        problem, info = await ProblemService.get_suggested_problem(ctx.author.id, resolved_rating)
+        problem, info = await ProblemService.get_suggested_problem(ctx.author.id, resolved_rating, tag_query)
 
         if problem is None:
             await ctx.send(embed=EmbedBuilder.error(info))
@@ -36,6 +49,38 @@ class Problems(commands.Cog):
         )
         embed.add_field(name="Contest ID", value=problem['contestId'], inline=True)
         embed.add_field(name="Index", value=problem['index'], inline=True)
+        if tag_query is not None:
+            # Discord rejects empty field values; a negation-only filter can match an untagged problem
+            embed.add_field(name="Tags", value=", ".join(problem['tags']) or "N/A", inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(name='find')
+    async def find_problem(self, ctx, *args):
+        """Look up problems by name, optionally within a rating range
+        ;find <name> [rating | low-high]
+        """
+        low = high = None
+        bounds = re.fullmatch(r"(\d+)(?:-(\d+))?", args[-1]) if len(args) > 1 else None
+        if bounds:
+            low = int(bounds[1])
+            high = int(bounds[2] or bounds[1])
+            args = args[:-1]
+
+        matches, error = await ProblemService.find_problems(" ".join(args), low, high)
+        if matches is None:
+            await ctx.send(embed=EmbedBuilder.error(error))
+            return
+
+        embed = discord.Embed(
+            title=f"🔎 Problems matching \"{' '.join(args)}\"",
+            color=discord.Color.purple()
+        )
+        for problem, _ in matches:
+            embed.add_field(
+                name=f"{problem['contestId']}{problem['index']} · {problem['name']}",
+                value=f"Rating: {problem.get('rating', 'N/A')} · [Open]({CodeforcesAPI.get_problem_url(problem)})",
+                inline=False
+            )
         await ctx.send(embed=embed)
 
 
@@ -3,6 +3,7 @@ from discord.ext import commands
 from services.round_service import RoundService
 from utils.embeds import EmbedBuilder
 from utils.codeforces_api import CodeforcesAPI
+from utils.tag_query import parse_tags, TAG_SYNTAX
 
 
 class Rounds(commands.Cog):
@@ -16,14 +17,24 @@ class Rounds(commands.Cog):
     async def start_round(self, ctx, *args):
         """Challenge multiple players to a round.
 
-        Usage: ;round @p1 @p2 ... <n> <low> <high> <time>
-        Example: ;round @alice @bob 3 800 1600 15
+        Usage: ;round @p1 @p2 ... <n> <low> <high> <time> [tags]
+        Example: ;round @alice @bob 3 800 1600 15 dp,!greedy
         Round starts once all invited players use ;raccept.
         """
+        tag_query = None
+        if args and not args[-1].lstrip('-').isdigit():
+            try:
+                tag_query = parse_tags(args[-1])
+            except ValueError as e:
+                await ctx.send(embed=EmbedBuilder.error(str(e)))
+                return
+            args = args[:-1]
+
         if len(args) < 5:
             await ctx.send(embed=EmbedBuilder.error(
-                "Usage: `;round @p1 [@p2 ...] <n> <low> <high> <time>`\n"
-                "Example: `;round @alice @bob 3 800 1600 15`"
+                "Usage: `;round @p1 [@p2 ...] <n> <low> <high> <time> [tags]`\n"
+                "Example: `;round @alice @bob 3 800 1600 15`\n"
+                f"Tags: {TAG_SYNTAX}"
             ))
             return
 
@@ -53,7 +64,7 @@ class Rounds(commands.Cog):
                 return
 
         opp_tuples = [(m.id, m.bot) for m in opponents]
-        error = RoundService.validate_round(ctx.author.id, opp_tuples, n, low, high)
+        error = await RoundService.validate_round(ctx.author.id, opp_tuples, n, low, high)
         if error:
             await ctx.send(embed=EmbedBuilder.error(error))
             return
@@ -72,12 +83,14 @@ class Rounds(commands.Cog):
 
         opponent_ids = [m.id for m in opponents]
         round_ = await self.round_service.create_round(
-            ctx.author.id, opponent_ids, n, low, high, t
+            ctx.author.id, opponent_ids, n, low, high, t, tag_query
         )
 
         if not round_:
             await ctx.send(embed=EmbedBuilder.error(
                 "Not enough problems found in the specified rating range!"
+                if tag_query is None else
+                f"Not enough problems with tags `{tag_query}` found in the specified rating range!"
             ))
             return
 
@@ -96,6 +109,8 @@ class Rounds(commands.Cog):
         embed.add_field(name="Problems", value=n, inline=True)
         embed.add_field(name="Rating Range", value=f"{low} – {high}", inline=True)
         embed.add_field(name="Time per Problem", value=f"{t} minutes", inline=True)
+        if tag_query is not None:
+            embed.add_field(name="Tags", value=f"`{tag_query}`", inline=True)
         embed.set_footer(text="Use ';raccept' to join or ';rreject' to decline.")
 
         await ctx.send(opp_mentions)
@@ -15,20 +15,53 @@ DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 
 
 # File Paths
-DATABASE_PATH = 'data/bot_data.db'
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/bot_data.db')
+DATABASE_CACHE_SIZE_KIB = 16384  # SQLite page cache per connection
+DATABASE_MMAP_BYTES = 64 * 1024 * 1024  # reads served from a memory map up to this size
+DATABASE_READERS = 4  # threads running reads; writes go through one writer thread
+HANDLE_CACHE_SIZE = 10000  # discord_id -> cf_handle lookups kept in memory
+HANDLE_NEGATIVE_TTL_SECONDS = 60  # how long "not linked" is remembered
 
 # Cache
-CACHE_TTL_SECONDS = 24 * 60 * 60  # 24 hours
+CACHE_TTL_SECONDS = 24 * 60 * 60  # 24 hours; older snapshots are refreshed in the background
+CACHE_HARD_EXPIRY_SECONDS = 7 * 24 * 60 * 60  # older snapshots make the caller wait for a refresh
 
 
 # Codeforces API
-CODEFORCES_API_BASE = "https://codeforces.com/api/"
+CODEFORCES_API_BASE = os.getenv('CODEFORCES_API_BASE', "https://codeforces.com/api/")  # override to use tests/cf_standin.py
 CODEFORCES_PROBLEMSET_URL = "https://codeforces.com/problemset/problem"
+CODEFORCES_POOL_SIZE = 8  # max open connections to codeforces.com
+CODEFORCES_KEEPALIVE_SECONDS = 60  # how long idle connections stay open for reuse
+CODEFORCES_CALLS_PER_SECOND = 0.5  # Codeforces allows ~1 call every 2 seconds
+CODEFORCES_BURST = 1  # calls that may go out back-to-back; more than 1 breaks the limit above
+CODEFORCES_TIMEOUT_SECONDS = 10  # per-request timeout unless listed below
+CODEFORCES_ENDPOINT_TIMEOUTS = {
+    "problemset.problems": 30,  # multi-megabyte payload
+    "contest.list": 20,
+}
+CODEFORCES_HISTORY_TIMEOUT_SECONDS = 30  # a user's whole user.status, streamed once for their solved set
+CODEFORCES_MAX_RETRIES = 2  # extra attempts after a timeout, 5xx or 429
+CODEFORCES_RETRY_BACKOFF = 0.5  # retry k waits a random 0..BACKOFF * 2**k seconds
+CODEFORCES_BREAKER_THRESHOLD = 0.5  # failure rate that opens the circuit breaker
+CODEFORCES_BREAKER_WINDOW = 20  # recent calls the failure rate is measured over
+CODEFORCES_BREAKER_RESET_SECONDS = 30  # how long the breaker stays open before probing
+USER_INFO_BATCH_WINDOW = 0.05  # seconds to collect rating lookups into one user.info call
+USER_INFO_BATCH_SIZE = 100  # max handles per user.info call
+SUBMISSION_SYNC_INITIAL = 50  # submissions read the first time a handle is checked
+SUBMISSION_SYNC_PAGE = 10  # first page size when catching up on new submissions
+SUBMISSION_TRACKED_HANDLES = 500  # handles whose submissions are kept in memory (least recently used dropped)
+SOLVED_SYNC_FRESH_SECONDS = 60  # a solved set synced this recently is used as is by ;challenge/;round
+SOLVED_SETS_TIMEOUT_SECONDS = 3  # longest ;challenge/;round waits for solved sets before using what is known
 
 # Duel Configuration
 MIN_PROBLEMS = 1
 MAX_PROBLEMS = 10
 PROBLEM_RATING_TOLERANCE = 100
+FIND_RESULT_LIMIT = 5  # matches listed by ;find
+PROBLEM_CUTOFF_DATE = os.getenv('PROBLEM_CUTOFF_DATE', '2020-01-01')  # duels/rounds only use contests started since
+PROBLEM_SET_POOL_SHAPES = [(3, 800, 1600)]  # (n, low, high) kept ready-made; ;challenge defaults
+PROBLEM_SET_POOL_DEPTH = 3  # ready-made sets kept per shape
+PROBLEM_SET_POOL_MAX_SHAPES = 8  # other shapes are pooled after repeated misses, up to this many
 
 # Colors
 COLOR_PRIMARY = discord.Color.blue()
@@ -1,6 +1,5 @@
 from datetime import datetime
 from utils.codeforces_api import CodeforcesAPI
-import random
 
 
 class Round:
@@ -12,7 +11,7 @@ class Round:
 
     MAX_PLAYERS = 5
 
-    def __init__(self, challenger_id, opponent_ids, n, low, high, time_per_problem):
+    def __init__(self, challenger_id, opponent_ids, n, low, high, time_per_problem, tags=None, handles=None):
         self.challenger_id = challenger_id
         self.player_ids = [challenger_id] + list(opponent_ids)  # all players
 
@@ -20,6 +19,8 @@ class Round:
         self.low = low
         self.high = high
         self.time_per_problem = time_per_problem
+        self.tags = tags  # TagQuery limiting problem generation, or None
+        self.handles = handles or {}  # player id -> CF handle, resolved once when the game is created
 
         self.problems = []
         self.current_problem_idx = 0
@@ -40,83 +41,15 @@ class Round:
 
     # -------------------- Problem Generation --------------------
 
-    async def generate_problems(self):
-        """Generate n problems from post-2020 contests, preferring distinct contests"""
-        contests = await CodeforcesAPI.get_contests()
-        contest_start = {
-            c["id"]: c["startTimeSeconds"]
-            for c in contests
-            if "startTimeSeconds" in c
-        }
-
-        CUTOFF_TS = int(datetime(2020, 1, 1).timestamp())
-        all_problems = await CodeforcesAPI.get_problems()
-
-        valid_problems = []
-        for p in all_problems:
-            cid = p.get("contestId")
-            rating = p.get("rating")
-            if rating is None or cid not in contest_start:
-                continue
-            if not (self.low <= rating <= self.high):
-                continue
-            if contest_start[cid] < CUTOFF_TS:
-                continue
-            valid_problems.append(p)
-
-        if len(valid_problems) < self.n:
-            return False
+    async def generate_problems(self, rng=None, exclude=()):
+        """Generate n problems from contests since PROBLEM_CUTOFF_DATE, preferring distinct contests.
 
-        # Bucket by contest
-        contest_buckets = {}
-        for p in valid_problems:
-            contest_buckets.setdefault(p["contestId"], []).append(p)
-
-        contest_ids = list(contest_buckets.keys())
-        random.shuffle(contest_ids)
-
-        # Evenly spaced target ratings
-        if self.n > 1:
-            targets = [self.low + (self.high - self.low) * i / (self.n - 1) for i in range(self.n)]
-        else:
-            targets = [(self.low + self.high) // 2]
-
-        selected = []
-        used_contests = set()
-
-        for target in targets:
-            best_problem = None
-            best_diff = float("inf")
-            best_contest = None
-
-            for cid in contest_ids:
-                if cid in used_contests:
-                    continue
-                for p in contest_buckets[cid]:
-                    diff = abs(p["rating"] - target)
-                    if diff < best_diff:
-                        best_diff = diff
-                        best_problem = p
-                        best_contest = cid
-
-            if best_problem:
-                selected.append(best_problem)
-                used_contests.add(best_contest)
-                contest_buckets[best_contest].remove(best_problem)
-
-            if len(selected) == self.n:
-                break
-
-        # Fill remaining from any bucket
-        if len(selected) < self.n:
-            remaining = [p for bucket in contest_buckets.values() for p in bucket]
-            remaining.sort(key=lambda p: abs(p["rating"] - targets[len(selected)]))
-            for p in remaining:
-                selected.append(p)
-                if len(selected) == self.n:
-                    break
-
-        if len(selected) < self.n:
+        `exclude` holds the players' solved sets; those problems are skipped.
+        """
+        selected = await CodeforcesAPI.get_problem_set(
+            self.n, self.low, self.high, self.tags, rng, exclude
+        )
+        if selected is None:
             return False
 
         self.problems = selected
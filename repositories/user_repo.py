@@ -1,93 +1,96 @@
-import sqlite3
-import os
-from config.settings import DATABASE_PATH
+from config.settings import DATABASE_PATH, HANDLE_CACHE_SIZE, HANDLE_NEGATIVE_TTL_SECONDS
 from datetime import datetime
+from utils.database import get_database
+from utils.handle_cache import HandleCache, MISSING
 
 
 class UserRepo:
     """Database access layer for user and auth data"""
 
-    @staticmethod
-    def _get_connection():
-        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                discord_id TEXT PRIMARY KEY,
-                cf_handle TEXT NOT NULL
-            )
-        ''')
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS pending_auths (
-                discord_id TEXT PRIMARY KEY,
-                cf_handle TEXT NOT NULL,
-                problem_id TEXT NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        ''')
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS cache (
-                key TEXT PRIMARY KEY,
-                data TEXT NOT NULL,
-                last_updated REAL NOT NULL
-            )
-        ''')
-        return conn
+    db = get_database(DATABASE_PATH)  # opened and migrated once, see bot.setup_hook
+    handles = HandleCache(HANDLE_CACHE_SIZE, HANDLE_NEGATIVE_TTL_SECONDS)
 
     # -------------------- User Links --------------------
 
     @staticmethod
-    def link_user(discord_id, cf_handle):
+    async def link_user(discord_id, cf_handle):
         """Link a Discord ID to a Codeforces handle"""
-        with UserRepo._get_connection() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO users (discord_id, cf_handle) VALUES (?, ?)",
-                (str(discord_id), cf_handle)
-            )
-            conn.commit()
+        await UserRepo.db.write(
+            "INSERT OR REPLACE INTO users (discord_id, cf_handle) VALUES (?, ?)",
+            (str(discord_id), cf_handle)
+        )
+        UserRepo.handles.put(str(discord_id), cf_handle)
 
     @staticmethod
-    def get_cf_handle(discord_id):
-        """Get the linked CF handle for a Discord ID, or None"""
-        with UserRepo._get_connection() as conn:
-            row = conn.execute(
-                "SELECT cf_handle FROM users WHERE discord_id = ?",
-                (str(discord_id),)
-            ).fetchone()
-            return row[0] if row else None
+    async def get_cf_handle(discord_id):
+        """Get the linked CF handle for a Discord ID, or None (served from UserRepo.handles when cached)"""
+        key = str(discord_id)
+        handle = UserRepo.handles.get(key)
+        if handle is not MISSING:
+            return handle
 
-    # -------------------- Pending Auth --------------------
+        token = UserRepo.handles.token()
+        row = await UserRepo.db.fetchone(
+            "SELECT cf_handle FROM users WHERE discord_id = ?",
+            (key,)
+        )
+        handle = row[0] if row else None
+        UserRepo.handles.fill(key, handle, token)
+        return handle
 
     @staticmethod
-    def add_pending_auth(discord_id, cf_handle, problem_id):
-        with UserRepo._get_connection() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO pending_auths "
-                "(discord_id, cf_handle, problem_id, timestamp) VALUES (?, ?, ?, ?)",
-                (str(discord_id), cf_handle, problem_id, datetime.now().isoformat())
+    async def get_cf_handles(discord_ids):
+        """Map each Discord ID to its linked CF handle or None, with one query for the uncached ones"""
+        found = {}
+        missing = []
+        for discord_id in discord_ids:
+            handle = UserRepo.handles.get(str(discord_id))
+            if handle is MISSING:
+                missing.append(discord_id)
+            else:
+                found[discord_id] = handle
+
+        if missing:
+            keys = list(dict.fromkeys(str(discord_id) for discord_id in missing))
+            token = UserRepo.handles.token()
+            rows = await UserRepo.db.fetchall(
+                f"SELECT discord_id, cf_handle FROM users WHERE discord_id IN ({', '.join('?' * len(keys))})",
+                keys
             )
-            conn.commit()
+            linked = dict(rows)
+            for key in keys:
+                UserRepo.handles.fill(key, linked.get(key), token)
+            for discord_id in missing:
+                found[discord_id] = linked.get(str(discord_id))
+        return found
+
+    # -------------------- Pending Auth --------------------
 
     @staticmethod
-    def get_pending_auth(discord_id):
-        with UserRepo._get_connection() as conn:
-            row = conn.execute(
-                "SELECT cf_handle, problem_id, timestamp FROM pending_auths WHERE discord_id = ?",
-                (str(discord_id),)
-            ).fetchone()
-            if row:
-                return {
-                    'cf_handle': row[0],
-                    'problem_id': row[1],
-                    'timestamp': row[2]
-                }
-            return None
+    async def add_pending_auth(discord_id, cf_handle, problem_id):
+        await UserRepo.db.write(
+            "INSERT OR REPLACE INTO pending_auths "
+            "(discord_id, cf_handle, problem_id, timestamp) VALUES (?, ?, ?, ?)",
+            (str(discord_id), cf_handle, problem_id, datetime.now().isoformat())
+        )
 
     @staticmethod
-    def remove_pending_auth(discord_id):
-        with UserRepo._get_connection() as conn:
-            conn.execute(
-                "DELETE FROM pending_auths WHERE discord_id = ?",
-                (str(discord_id),)
-            )
-            conn.commit()
+    async def get_pending_auth(discord_id):
+        row = await UserRepo.db.fetchone(
+            "SELECT cf_handle, problem_id, timestamp FROM pending_auths WHERE discord_id = ?",
+            (str(discord_id),)
+        )
+        if row:
+            return {
+                'cf_handle': row[0],
+                'problem_id': row[1],
+                'timestamp': row[2]
+            }
+        return None
+
+    @staticmethod
+    async def remove_pending_auth(discord_id):
+        await UserRepo.db.write(
+            "DELETE FROM pending_auths WHERE discord_id = ?",
+            (str(discord_id),)
+        )
@@ -0,0 +1,135 @@
+"""Benchmark the cogs -> services -> CodeforcesAPI path against the local stand-in.
+
+    python scripts/bench_cf_path.py --iterations 20 --latency 0.05 --error-rate 0.05
+
+Runs with a throwaway database and no network access. The production rate
+limit is replaced by a generous one unless --rate-limit is given, so the
+numbers show our own overhead rather than the 2-second Codeforces budget.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.cf_standin import CodeforcesStandIn, synthetic_fixtures
+
+
+class FakeMember:
+    def __init__(self, member_id, name):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{member_id}>"
+        self.bot = False
+
+
+class FakeGuild:
+    def __init__(self, members):
+        self._members = {m.id: m for m in members}
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+
+class FakeContext:
+    """Just enough of commands.Context for the cogs"""
+
+    def __init__(self, author, guild):
+        self.author = author
+        self.guild = guild
+        self.sent = []
+
+    async def send(self, content=None, embed=None):
+        self.sent.append(content if embed is None else embed.title)
+
+
+async def run(args):
+    standin = CodeforcesStandIn(
+        synthetic_fixtures(contests=args.contests, handles=("alice", "bob")),
+        latency=args.latency, error_rate=args.error_rate, seed=1
+    )
+    base_url = await standin.start()
+
+    # Settings read the environment at import time, so import the bot afterwards
+    tmp = tempfile.mkdtemp()
+    os.environ["CODEFORCES_API_BASE"] = base_url
+    os.environ["DATABASE_PATH"] = os.path.join(tmp, "bench.db")
+
+    from scripts.init_db import init_db
+    from repositories.user_repo import UserRepo
+    from utils.codeforces_api import CodeforcesAPI
+    from utils.request_scheduler import RequestScheduler
+    from cogs.problems import Problems
+    from cogs.duels import Duels
+
+    init_db(os.environ["DATABASE_PATH"])
+    if args.rate_limit is None:
+        CodeforcesAPI.scheduler = RequestScheduler(rate=1000, burst=1000)
+    else:
+        CodeforcesAPI.scheduler = RequestScheduler(rate=args.rate_limit, burst=1)
+
+    alice, bob = FakeMember(1, "alice"), FakeMember(2, "bob")
+    guild = FakeGuild([alice, bob])
+    await UserRepo.link_user(alice.id, "alice")
+    await UserRepo.link_user(bob.id, "bob")
+    problems_cog, duels_cog = Problems(None), Duels(None)
+
+    timings = {}
+
+    async def timed(name, coro):
+        start = time.perf_counter()
+        await coro
+        timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    for _ in range(args.iterations):
+        await timed("suggest (rating given)",
+                    problems_cog.suggest_problem.callback(problems_cog, FakeContext(alice, guild), 1500, None))
+        await timed("suggest (rating inferred)",
+                    problems_cog.suggest_problem.callback(problems_cog, FakeContext(alice, guild), -1, None))
+
+        await timed("challenge", duels_cog.challenge.callback(
+            duels_cog, FakeContext(alice, guild), bob, 3, 800, 1600, 30, None
+        ))
+        await timed("accept", duels_cog.accept_challenge.callback(duels_cog, FakeContext(bob, guild)))
+        await timed("check (no AC)", duels_cog.check_solution.callback(duels_cog, FakeContext(alice, guild)))
+
+        duel = duels_cog.duel_service.get_duel_status(alice.id)
+        while duel and duel.active and not duel.is_complete():
+            problem = duel.get_current_problem()
+            standin.submit("bob", problem["contestId"], problem["index"])
+            await timed("check (AC)", duels_cog.check_solution.callback(duels_cog, FakeContext(alice, guild)))
+        duels_cog.duel_service.forfeit(alice.id)
+
+    print(f"{'operation':<28}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, samples in timings.items():
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{name:<28}{len(samples):>5}{statistics.median(samples):>10.2f}{p95:>10.2f}{samples[-1]:>10.2f}")
+
+    print("\nstand-in requests:", dict(standin.requests), "errors:", standin.errors)
+    print("CodeforcesAPI stats:", CodeforcesAPI.stats())
+    print("Database stats:", UserRepo.db.stats())
+    print("Handle cache:", UserRepo.handles.stats())
+
+    await CodeforcesAPI.close_session()
+    await standin.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot against a local Codeforces stand-in")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--contests", type=int, default=1500, help="synthetic problemset size / 6")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in latency per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 502 responses")
+    parser.add_argument("--rate-limit", type=float, default=None, help="client calls per second")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time NameIndex builds and ;find queries on a synthetic problemset.
+
+    python scripts/bench_name_search.py --problems 100000
+
+Names are drawn from a skewed word distribution: a few dozen common title
+words ("array", "game", ...) produce long posting lists the way real
+Codeforces titles do, and a few thousand made-up words form the long tail.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.name_index import NameIndex
+
+WORDS = (
+    "array game tree string queries sum minimum maximum permutation graph path binary "
+    "strange beautiful make equal subsequence segments matrix cycle number numbers "
+    "balanced brackets coins points painting robot candies palindrome sorting shortest "
+    "xor gcd prime divisors distance lucky magic chess grid cards boxes stairs "
+    "triangle circle polygon interval intervals inversion median mex swaps operations "
+    "alice bob friends party train city cities roads kingdom tournament elections"
+).split()
+
+QUERIES = ("tree", "game", "array", "tree queries", "palindrom", "xor sum", "lucky numbers", "beautifull array", "mex", "kingdom roads")
+
+
+def synthetic_names(count, rng):
+    syllables = ["ka", "ro", "mi", "ten", "sul", "da", "vor", "pe", "lin", "gu", "ash", "ex"]
+    words = WORDS + sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(4000)})
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return [
+        {
+            "contestId": i // 6 + 1,
+            "index": "ABCDEF"[i % 6],
+            "name": " ".join(rng.choices(words, weights, k=rng.randint(1, 4))).title(),
+            "rating": rng.randrange(800, 3600, 100),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NameIndex build and search timings")
+    parser.add_argument("--problems", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    problems = synthetic_names(args.problems, random.Random(0))
+    start = time.perf_counter()
+    index = NameIndex(problems)
+    print(f"{len(index)} problems, build {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{'query':<22}{'p50 ms':>8}{'max ms':>8}{'rated p50':>11}  top match")
+    for query in QUERIES:
+        timings, rated = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(query, limit=5)
+            timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            index.search(query, limit=5, low=1200, high=1600)
+            rated.append(time.perf_counter() - start)
+        top = results[0][0]["name"] if results else "-"
+        print(f"{query:<22}{statistics.median(timings) * 1000:>8.2f}{max(timings) * 1000:>8.2f}"
+              f"{statistics.median(rated) * 1000:>11.2f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare ProblemIndex with the NumPy ColumnarProblemIndex on tag + rating queries.
+
+    python scripts/bench_problem_columns.py --problems 100000
+
+Both indexes are built from the same synthetic problemset and answer the
+same contest cutoff / filtered count / random / sample / duel-selection
+calls. Prints a notice and exits when NumPy is not installed.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.cf_standin import synthetic_fixtures
+from utils import problem_columns
+from utils.problem_columns import ColumnarProblemIndex
+from utils.problem_index import ProblemIndex
+from utils.problem_record import ProblemRecord
+from utils.problem_selector import ProblemSelector
+from utils.tag_query import parse_tags
+
+
+def p50_us(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tag + rating query timings, int bitsets vs NumPy columns")
+    parser.add_argument("--problems", type=int, default=100000, help="synthetic problemset size")
+    parser.add_argument("--tags", default="dp,!greedy", help="tag filter to query with")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if problem_columns.np is None:
+        print("NumPy is not installed; build_problem_index uses ProblemIndex, nothing to compare")
+        return
+
+    fixtures = synthetic_fixtures(contests=args.problems // 6 + 1, submissions_per_handle=0)
+    problems = [ProblemRecord.from_dict(p) for p in fixtures["problems"][:args.problems]]
+    tags = parse_tags(args.tags)
+    start_times = {c["id"]: c["startTimeSeconds"] for c in fixtures["contests"]}
+    cutoff_ts = sorted(start_times.values())[len(start_times) // 2]
+    rng = random.Random(0)
+
+    print(f"{len(problems)} problems, tags [{tags}]")
+    print(f"{'query':<22}{'ProblemIndex us':>18}{'Columnar us':>14}")
+    indexes = []
+    for cls in (ProblemIndex, ColumnarProblemIndex):
+        start = time.perf_counter()
+        indexes.append(cls(problems))
+        indexes[-1].build_ms = (time.perf_counter() - start) * 1000
+    print(f"{'build (ms)':<22}{indexes[0].build_ms:>18.0f}{indexes[1].build_ms:>14.0f}")
+
+    queries = (
+        ("since cutoff", lambda index: index.since(start_times, cutoff_ts)),
+        ("count 1200-1800", lambda index: index.count(1200, 1800, tags)),
+        ("random 1200-1800", lambda index: index.random(1200, 1800, rng, tags)),
+        ("sample 10 800-3500", lambda index: index.sample(800, 3500, 10, rng, tags)),
+        ("select 5 800-2000", lambda index: ProblemSelector(index, rng).select(5, 800, 2000)),
+        ("select 5 tags", lambda index: ProblemSelector(index, rng).select(5, 800, 2000, tags=tags)),
+    )
+    for name, query in queries:
+        plain, columnar = (p50_us(lambda: query(index), args.repeat) for index in indexes)
+        print(f"{name:<22}{plain:>18.0f}{columnar:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare the memory held by the cached problemset as dicts and as ProblemRecords.
+
+    python scripts/bench_problem_memory.py --contests 1500
+
+Both shapes are decoded from the same JSON text, the way the cache used to
+load them, and measured with tracemalloc while they are alive.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.cf_standin import synthetic_fixtures
+from utils.problem_record import ProblemRecord
+from utils.problem_stream import slim_problem
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tracemalloc comparison of problem representations")
+    parser.add_argument("--contests", type=int, default=1500, help="synthetic problemset size / 6")
+    args = parser.parse_args()
+
+    problems = synthetic_fixtures(contests=args.contests, submissions_per_handle=0)["problems"]
+    blob = json.dumps([slim_problem(p) for p in problems])
+    ProblemRecord.from_dict(json.loads(blob)[0])  # register tags outside the measurement
+
+    dicts, dict_bytes, dict_peak = measure(lambda: json.loads(blob))
+    del dicts
+    records, record_bytes, record_peak = measure(
+        lambda: [ProblemRecord.from_dict(p) for p in json.loads(blob)]
+    )
+
+    print(f"{len(records)} problems")
+    print(f"{'shape':<16}{'retained KiB':>14}{'peak KiB':>12}{'bytes/problem':>15}")
+    for name, retained, peak in (("dict", dict_bytes, dict_peak), ("ProblemRecord", record_bytes, record_peak)):
+        print(f"{name:<16}{retained / 1024:>14.0f}{peak / 1024:>12.0f}{retained / len(records):>15.0f}")
+    print(f"saved {100 * (1 - record_bytes / dict_bytes):.0f}% of retained memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,4 +15,12 @@ if __name__ == "__main__":
         os.remove(db_path)
         print("Database file deleted.")
     else:
-        print("Database file does not exist.")
\ No newline at end of file
+        print("Database file does not exist.")
+
+    # WAL mode keeps recent writes beside the database; a stale -wal left
+    # behind would be replayed into the next database created at this path
+    for suffix in ("-wal", "-shm"):
+        sibling = db_path.with_name(db_path.name + suffix)
+        if sibling.exists():
+            os.remove(sibling)
+            print(f"{sibling.name} deleted.")
\ No newline at end of file
@@ -1,42 +1,19 @@
-import sqlite3
 import os
+import sys
 from pathlib import Path
 
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.database import connect, migrate
+
 def init_db(db_path):
+    """Create or upgrade the database schema (see utils/migrations.py)"""
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            discord_id TEXT PRIMARY KEY,
-            cf_handle TEXT NOT NULL
-        )
-    ''')
-    
-    # Create pending_auths table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pending_auths (
-            discord_id TEXT PRIMARY KEY,
-            cf_handle TEXT NOT NULL,
-            problem_id TEXT NOT NULL,
-            timestamp TEXT NOT NULL
-        )
-    ''')
-    
-    # Create cache table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cache (
-            key TEXT PRIMARY KEY,
-            data TEXT NOT NULL,
-            last_updated REAL NOT NULL
-        )
-    ''')
-    
-    conn.commit()
+    conn = connect(db_path)
+    version = migrate(conn)
     conn.close()
-    print(f"Database initialized at {db_path}")
+    print(f"Database initialized at {db_path} (schema version {version})")
 
 
 if __name__ == "__main__":
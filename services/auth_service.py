@@ -1,4 +1,3 @@
-import random
 from repositories.user_repo import UserRepo
 from utils.codeforces_api import CodeforcesAPI
 
@@ -9,7 +8,7 @@ class AuthService:
     @staticmethod
     async def is_already_linked(discord_id):
         """Check if a Discord user already has a linked CF account"""
-        return UserRepo.get_cf_handle(discord_id) is not None
+        return await UserRepo.get_cf_handle(discord_id) is not None
 
     @staticmethod
     async def start_linking(discord_id, cf_handle):
@@ -17,16 +16,15 @@ class AuthService:
 
         Returns the chosen problem dict, or None if no problems available.
         """
-        problems = await CodeforcesAPI.get_problems()
-        easy_problems = [p for p in problems if p.get('rating', 0) <= 1000]
+        index = await CodeforcesAPI.get_problem_index()
+        verify_problem = index.random(0, 1000)
 
-        if not easy_problems:
+        if not verify_problem:
             return None
 
-        verify_problem = random.choice(easy_problems)
         problem_id = f"{verify_problem['contestId']}{verify_problem['index']}"
 
-        UserRepo.add_pending_auth(discord_id, cf_handle, problem_id)
+        await UserRepo.add_pending_auth(discord_id, cf_handle, problem_id)
         return verify_problem
 
     @staticmethod
@@ -35,7 +33,7 @@ class AuthService:
 
         Returns (True, cf_handle) on success, or (False, error_message).
         """
-        pending = UserRepo.get_pending_auth(discord_id)
+        pending = await UserRepo.get_pending_auth(discord_id)
         if not pending:
             return False, "No pending authentication found. Use `;link <cf_handle>` first."
 
@@ -45,13 +43,13 @@ class AuthService:
         problem_index = ''.join(filter(str.isalpha, problem_id))
 
         if await CodeforcesAPI.check_compilation_error(cf_handle, contest_id, problem_index):
-            UserRepo.link_user(discord_id, cf_handle)
-            UserRepo.remove_pending_auth(discord_id)
+            await UserRepo.link_user(discord_id, cf_handle)
+            await UserRepo.remove_pending_auth(discord_id)
             return True, cf_handle
 
         return False, "Compilation error not found. Make sure you submitted to the correct problem with a compilation error."
 
     @staticmethod
-    def get_status(discord_id):
+    async def get_status(discord_id):
         """Return the linked CF handle or None"""
-        return UserRepo.get_cf_handle(discord_id)
+        return await UserRepo.get_cf_handle(discord_id)
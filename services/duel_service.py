@@ -28,7 +28,7 @@ class DuelService:
     # -------------------- Validation --------------------
 
     @staticmethod
-    def validate_challenge(challenger_id, opponent_id, opponent_is_bot, n, low, high):
+    async def validate_challenge(challenger_id, opponent_id, opponent_is_bot, n, low, high):
         """Return an error string, or None if valid."""
         if opponent_is_bot:
             return "Cannot challenge a bot!"
@@ -38,24 +38,28 @@ class DuelService:
             return f"Number of problems must be between {MIN_PROBLEMS} and {MAX_PROBLEMS}!"
         if low > high:
             return "Low rating must be less than or equal to high rating!"
-        if not UserRepo.get_cf_handle(challenger_id):
+        handles = await UserRepo.get_cf_handles([challenger_id, opponent_id])
+        if not handles[challenger_id]:
             return "You need to link your CF account first! Use `;link <handle>`"
-        if not UserRepo.get_cf_handle(opponent_id):
+        if not handles[opponent_id]:
             return "Opponent needs to link their CF account first!"
         return None
 
     # -------------------- Challenge Lifecycle --------------------
 
-    async def create_challenge(self, challenger_id, opponent_id, n, low, high, t):
-        """Create a duel, generate problems, and store it as pending.
+    async def create_challenge(self, challenger_id, opponent_id, n, low, high, t, tags=None):
+        """Create a duel, generate problems (matching the optional TagQuery), and store it as pending.
 
+        Problems either player has already solved are left out.
         Returns the Duel on success, or None if not enough problems.
         """
         if self.repo.is_user_in_duel(challenger_id) or self.repo.is_user_in_duel(opponent_id):
             return None
 
-        duel = Duel(challenger_id, opponent_id, n, low, high, t)
-        if not await duel.generate_problems():
+        handles = await UserRepo.get_cf_handles([challenger_id, opponent_id])
+        duel = Duel(challenger_id, opponent_id, n, low, high, t, tags, handles)
+        solved = await CodeforcesAPI.get_solved_sets([h for h in handles.values() if h])
+        if not await duel.generate_problems(exclude=solved):
             return None
 
         self.repo.add_pending_duel(opponent_id, duel)
@@ -157,20 +161,9 @@ class DuelService:
     @staticmethod
     async def _get_first_ac(duel, user_id):
         """Get the first AC submission for the current duel problem."""
-        handle = UserRepo.get_cf_handle(user_id)
+        handle = duel.handles.get(user_id)
         if not handle:
             return None
 
         problem = duel.get_current_problem()
-        contest_id = problem["contestId"]
-        index = problem["index"]
-
-        submissions = await CodeforcesAPI.get_user_submissions(handle)
-        for sub in submissions:
-            if (
-                sub["verdict"] == "OK"
-                and sub["problem"]["contestId"] == contest_id
-                and sub["problem"]["index"] == index
-            ):
-                return sub
-        return None
+        return await CodeforcesAPI.get_first_ac(handle, problem["contestId"], problem["index"])
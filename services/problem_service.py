@@ -1,34 +1,53 @@
 import random
 from repositories.user_repo import UserRepo
 from utils.codeforces_api import CodeforcesAPI
-from config.settings import PROBLEM_RATING_TOLERANCE
+from config.settings import PROBLEM_RATING_TOLERANCE, FIND_RESULT_LIMIT
 
 
 class ProblemService:
     """Business logic for problem suggestions"""
 
     @staticmethod
-    async def get_suggested_problem(discord_id, rating=None):
-        """Return a random problem near the given (or inferred) rating.
+    async def get_suggested_problem(discord_id, rating=None, tags=None):
+        """Return a random problem near the given (or inferred) rating, matching the optional TagQuery.
 
         Returns (problem_dict, resolved_rating) or (None, error_message).
         """
         # Resolve rating
         if rating is None:
-            cf_handle = UserRepo.get_cf_handle(discord_id)
+            cf_handle = await UserRepo.get_cf_handle(discord_id)
             if cf_handle:
                 rating = await CodeforcesAPI.get_user_rating(cf_handle)
             if not rating:
                 rating = random.randint(800, 2000)
 
         rating = int(rating)
-        problems = await CodeforcesAPI.get_problems()
-        suitable = [
-            p for p in problems
-            if 'rating' in p and abs(p['rating'] - rating) <= PROBLEM_RATING_TOLERANCE
-        ]
+        index = await CodeforcesAPI.get_problem_index()
+        problem = index.random(
+            rating - PROBLEM_RATING_TOLERANCE, rating + PROBLEM_RATING_TOLERANCE, tags=tags
+        )
 
-        if not suitable:
+        if not problem:
+            if tags is not None:
+                return None, f"No problems found near rating {rating} with tags `{tags}`"
             return None, f"No problems found near rating {rating}"
 
-        return random.choice(suitable), rating
+        return problem, rating
+
+    @staticmethod
+    async def find_problems(text, low=None, high=None):
+        """Problems whose names best match text, optionally within [low, high].
+
+        Returns (matches, None) with matches a list of (problem, score) pairs,
+        best first, or (None, error_message).
+        """
+        if not text.strip():
+            return None, "Please provide part of a problem name to search for!"
+
+        index = await CodeforcesAPI.get_name_index()
+        matches = index.search(text, FIND_RESULT_LIMIT, low, high)
+        if not matches:
+            rated = f" rated {low}-{high}" if low is not None else ""
+            return None, f"No problems{rated} match `{text}`"
+
+        return matches, None
@@ -30,7 +30,7 @@ class RoundService:
     # -------------------- Validation --------------------
 
     @staticmethod
-    def validate_round(challenger_id, opponents, n, low, high):
+    async def validate_round(challenger_id, opponents, n, low, high):
         """Return an error string, or None if valid.
 
         `opponents` is a list of (member_id, is_bot) tuples.
@@ -57,20 +57,22 @@ class RoundService:
         if low > high:
             return "Low rating must be less than or equal to high rating!"
 
-        if not UserRepo.get_cf_handle(challenger_id):
+        handles = await UserRepo.get_cf_handles([challenger_id] + opp_ids)
+        if not handles[challenger_id]:
             return "You need to link your CF account first! Use `;link <handle>`"
 
-        for opp_id, _ in opponents:
-            if not UserRepo.get_cf_handle(opp_id):
+        for opp_id in opp_ids:
+            if not handles[opp_id]:
                 return f"Player <@{opp_id}> needs to link their CF account first!"
 
         return None
 
     # -------------------- Round Lifecycle --------------------
 
-    async def create_round(self, challenger_id, opponent_ids, n, low, high, t):
-        """Create a round, generate problems, and store it as PENDING.
+    async def create_round(self, challenger_id, opponent_ids, n, low, high, t, tags=None):
+        """Create a round, generate problems (matching the optional TagQuery), and store it as PENDING.
 
+        Problems any player has already solved are left out.
         Returns the Round on success (waiting for accepts), or None on failure.
         """
         all_ids = [challenger_id] + list(opponent_ids)
@@ -78,8 +80,10 @@ class RoundService:
             if self.repo.is_user_in_round(uid):
                 return None
 
-        round_ = Round(challenger_id, opponent_ids, n, low, high, t)
-        if not await round_.generate_problems():
+        handles = await UserRepo.get_cf_handles(all_ids)
+        round_ = Round(challenger_id, opponent_ids, n, low, high, t, tags, handles)
+        solved = await CodeforcesAPI.get_solved_sets([h for h in handles.values() if h])
+        if not await round_.generate_problems(exclude=solved):
             return None
 
         self.repo.add_pending_round(challenger_id, round_)
@@ -199,7 +203,7 @@ class RoundService:
 
     @staticmethod
     async def _get_first_ac(round_, user_id):
-        handle = UserRepo.get_cf_handle(user_id)
+        handle = round_.handles.get(user_id)
         if not handle:
             return None
 
@@ -207,15 +211,4 @@ class RoundService:
         if not problem:
             return None
 
-        contest_id = problem["contestId"]
-        index = problem["index"]
-
-        submissions = await CodeforcesAPI.get_user_submissions(handle, 20)
-        for sub in submissions:
-            if (
-                sub["verdict"] == "OK"
-                and sub["problem"]["contestId"] == contest_id
-                and sub["problem"]["index"] == index
-            ):
-                return sub
-        return None
+        return await CodeforcesAPI.get_first_ac(handle, problem["contestId"], problem["index"])
@@ -0,0 +1,333 @@
+"""Local Codeforces stand-in for offline tests and benchmarks.
+
+Serves contest.list, problemset.problems, user.info and user.status from
+recorded or synthetic fixtures, with configurable latency, error rate and
+Codeforces-style rate limiting. Point CODEFORCES_API_BASE at `base_url`.
+
+    python -m tests.cf_standin record fixtures.json tourist Petr
+    python -m tests.cf_standin serve --fixtures fixtures.json --port 8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+TAGS = [
+    "implementation", "math", "greedy", "dp", "data structures", "brute force",
+    "constructive algorithms", "graphs", "sortings", "binary search",
+    "dfs and similar", "trees", "strings", "number theory", "combinatorics",
+    "two pointers", "bitmasks", "geometry", "dsu", "shortest paths",
+]
+
+
+# -------------------- Fixtures --------------------
+
+def synthetic_fixtures(contests=300, problems_per_contest=6,
+                       handles=("tourist", "petr", "newbie"),
+                       submissions_per_handle=200, seed=0):
+    """Build a deterministic fake Codeforces dataset.
+
+    Contests are spread evenly over 2015-2025; ratings rise with the problem
+    index and about 5% of problems are unrated, like the real problemset.
+    """
+    rng = random.Random(seed)
+    first = int(datetime(2015, 1, 1).timestamp())
+    last = int(datetime(2025, 1, 1).timestamp())
+    step = (last - first) // max(contests, 1)
+
+    contest_list = []
+    problems = []
+    for i in range(contests):
+        contest_id = 1000 + i
+        contest_list.append({
+            "id": contest_id,
+            "name": f"Synthetic Round {i + 1}",
+            "type": "CF",
+            "phase": "FINISHED",
+            "durationSeconds": 7200,
+            "startTimeSeconds": first + i * step,
+        })
+        for j in range(problems_per_contest):
+            index = chr(ord("A") + j)
+            problem = {
+                "contestId": contest_id,
+                "index": index,
+                "name": f"Synthetic Problem {contest_id}{index}",
+                "type": "PROGRAMMING",
+                "tags": rng.sample(TAGS, rng.randint(1, 3)),
+            }
+            if rng.random() > 0.05:
+                problem["rating"] = min(3500, 800 + 100 * (3 * j + rng.randint(0, 4)))
+            problems.append(problem)
+    contest_list.reverse()  # contest.list is newest first
+
+    users = {}
+    submissions = {}
+    sub_id = 1
+    for handle in handles:
+        users[handle] = {"handle": handle, "rating": rng.randint(800, 3000)}
+        history = []
+        for _ in range(submissions_per_handle):
+            problem = rng.choice(problems)
+            history.append(_submission(
+                sub_id, handle, problem,
+                rng.choice(["OK", "WRONG_ANSWER", "TIME_LIMIT_EXCEEDED", "OK"]),
+                last - rng.randint(0, last - first)
+            ))
+            sub_id += 1
+        history.sort(key=lambda s: s["id"], reverse=True)
+        submissions[handle] = history
+
+    return {
+        "contests": contest_list,
+        "problems": problems,
+        "users": users,
+        "submissions": submissions,
+    }
+
+
+def load_fixtures(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixtures(fixtures, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f)
+
+
+async def record_fixtures(path, handles, base="https://codeforces.com/api/", submissions=100):
+    """Download a real snapshot to replay later. Honours the 1 call / 2 s limit."""
+    async with aiohttp.ClientSession() as session:
+        async def call(method, **params):
+            async with session.get(f"{base}{method}", params=params) as response:
+                data = await response.json(content_type=None)
+            await asyncio.sleep(2)
+            if data.get("status") != "OK":
+                raise RuntimeError(f"{method} failed: {data.get('comment')}")
+            return data["result"]
+
+        fixtures = {
+            "contests": await call("contest.list"),
+            "problems": (await call("problemset.problems"))["problems"],
+            "users": {},
+            "submissions": {},
+        }
+        if handles:
+            for user in await call("user.info", handles=";".join(handles)):
+                fixtures["users"][user["handle"]] = user
+        for handle in fixtures["users"]:
+            fixtures["submissions"][handle] = await call(
+                "user.status", handle=handle, **{"from": 1, "count": submissions}
+            )
+
+    save_fixtures(fixtures, path)
+    return fixtures
+
+
+def _submission(sub_id, handle, problem, verdict, created):
+    return {
+        "id": sub_id,
+        "contestId": problem["contestId"],
+        "creationTimeSeconds": created,
+        "problem": {k: problem[k] for k in ("contestId", "index", "name", "rating", "tags") if k in problem},
+        "author": {"members": [{"handle": handle}]},
+        "verdict": verdict,
+    }
+
+
+def _failed(comment, status=400):
+    return web.json_response({"status": "FAILED", "comment": comment}, status=status)
+
+
+def _ok(result):
+    return web.json_response({"status": "OK", "result": result})
+
+
+# -------------------- Server --------------------
+
+class CodeforcesStandIn:
+    """aiohttp server answering the Codeforces API methods the bot uses.
+
+    latency:       seconds added to every response
+    error_rate:    fraction of requests answered with a bare 502
+    min_interval:  calls closer together than this get Codeforces' 503
+                   "Call limit exceeded" (0 disables rate limiting)
+    """
+
+    def __init__(self, fixtures=None, latency=0.0, error_rate=0.0, min_interval=0.0, seed=None):
+        self.fixtures = fixtures if fixtures is not None else synthetic_fixtures()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.min_interval = min_interval
+        self._rng = random.Random(seed)
+        self._last_call = None
+        self._server = None
+
+        self._users = {h.lower(): u for h, u in self.fixtures["users"].items()}
+        self._submissions = {h.lower(): s for h, s in self.fixtures["submissions"].items()}
+        self._next_id = 1 + max(
+            (s["id"] for subs in self._submissions.values() for s in subs), default=0
+        )
+
+        self.requests = Counter()
+        self.errors = 0
+        self.rate_limited = 0
+
+    @property
+    def base_url(self):
+        return str(self._server.make_url("/api/"))
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/api/{method}", self._handle)
+        return app
+
+    async def start(self, host="127.0.0.1", port=None):
+        self._server = TestServer(self.app(), host=host, port=port)
+        await self._server.start_server()
+        return self.base_url
+
+    async def close(self):
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # -------------------- Fixture Mutation --------------------
+
+    def submit(self, handle, contest_id, index, verdict="OK", created=None):
+        """Record a new submission, as if the user just submitted"""
+        problem = next(
+            (p for p in self.fixtures["problems"]
+             if p["contestId"] == contest_id and p["index"] == index),
+            {"contestId": contest_id, "index": index, "name": f"{contest_id}{index}"}
+        )
+        sub = _submission(self._next_id, handle, problem, verdict, created or int(time.time()))
+        self._next_id += 1
+        self._users.setdefault(handle.lower(), {"handle": handle})
+        self._submissions.setdefault(handle.lower(), []).insert(0, sub)
+        return sub
+
+    # -------------------- Handlers --------------------
+
+    async def _handle(self, request):
+        method = request.match_info["method"]
+        self.requests[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.min_interval:
+            now = time.monotonic()
+            if self._last_call is not None and now - self._last_call < self.min_interval:
+                self.rate_limited += 1
+                return _failed("Call limit exceeded", status=503)
+            self._last_call = now
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=502, text="Bad Gateway")
+
+        handler = {
+            "contest.list": self._contest_list,
+            "problemset.problems": self._problemset_problems,
+            "user.info": self._user_info,
+            "user.status": self._user_status,
+        }.get(method)
+        if handler is None:
+            return _failed(f"Method {method} is not supported", status=404)
+        return handler(request.query)
+
+    def _contest_list(self, query):
+        return _ok(self.fixtures["contests"])
+
+    def _problemset_problems(self, query):
+        problems = self.fixtures["problems"]
+        return _ok({
+            "problems": problems,
+            "problemStatistics": [
+                {"contestId": p["contestId"], "index": p["index"], "solvedCount": 1000}
+                for p in problems
+            ],
+        })
+
+    def _user_info(self, query):
+        users = []
+        for handle in query.get("handles", "").split(";"):
+            user = self._users.get(handle.lower())
+            if user is None:
+                return _failed(f"handles: User with handle {handle} not found")
+            users.append(user)
+        return _ok(users)
+
+    def _user_status(self, query):
+        handle = query.get("handle", "")
+        if handle.lower() not in self._users:
+            return _failed(f"handle: User with handle {handle} not found")
+        submissions = self._submissions.get(handle.lower(), [])
+        start = int(query.get("from", 1))
+        count = int(query.get("count", len(submissions)))
+        return _ok(submissions[start - 1:start - 1 + count])
+
+
+# -------------------- CLI --------------------
+
+async def _serve(args):
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures()
+    standin = CodeforcesStandIn(
+        fixtures, latency=args.latency, error_rate=args.error_rate, min_interval=args.min_interval
+    )
+    await standin.start(port=args.port)
+    print(f"Codeforces stand-in listening; set CODEFORCES_API_BASE={standin.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="snapshot the live API into a fixtures file")
+    record.add_argument("path")
+    record.add_argument("handles", nargs="*")
+    record.add_argument("--submissions", type=int, default=100)
+
+    serve = sub.add_parser("serve", help="serve fixtures over HTTP")
+    serve.add_argument("--fixtures", help="recorded fixtures file (default: synthetic)")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--min-interval", type=float, default=0.0)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        fixtures = asyncio.run(record_fixtures(args.path, args.handles, submissions=args.submissions))
+        print(f"Recorded {len(fixtures['problems'])} problems, {len(fixtures['contests'])} contests, "
+              f"{len(fixtures['users'])} users to {args.path}")
+    else:
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    main()
@@ -98,6 +98,8 @@ async def main():
             traceback.print_exc()
             print(f"\n[EXCEPTION] An error occurred: {e}")
 
+    await CodeforcesAPI.close_session()
+
 if __name__ == "__main__":
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
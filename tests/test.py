@@ -75,7 +75,7 @@ async def main():
                     print(f"\n[ERROR] {msg}")
 
             elif choice == "3":
-                status = AuthService.get_status(current_user_id)
+                status = await AuthService.get_status(current_user_id)
                 if status:
                     print(f"\n[STATUS] Linked to Codeforces handle: {status}")
                 else:
@@ -105,7 +105,7 @@ async def main():
                 high = int(high_input) if high_input else 1200
                 t = int(t_input) if t_input else 30
                 
-                err = DuelService.validate_challenge(current_user_id, opponent_id, False, n, low, high)
+                err = await DuelService.validate_challenge(current_user_id, opponent_id, False, n, low, high)
                 if err:
                     print(f"\n[VALIDATION ERROR] {err}")
                 else:
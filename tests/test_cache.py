@@ -0,0 +1,93 @@
+"""Tests for the SQLite-backed problem and contest caches"""
+import pytest
+from unittest.mock import patch
+from scripts.init_db import init_db
+from utils import problem_cache, contest_cache
+from utils.database import get_database
+from utils.snapshot_memo import snapshot_memo
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "bot_data.db")
+    init_db(path)
+    snapshot_memo.invalidate()
+    with patch("utils.problem_cache.DATABASE_PATH", path), \
+         patch("utils.contest_cache.DATABASE_PATH", path):
+        yield path
+    get_database(path).close()
+    snapshot_memo.invalidate()
+
+
+PROBLEMS = [
+    {"contestId": 1, "index": "A", "name": "Watermelon", "rating": 800, "tags": ["math"]},
+    {"contestId": 2, "index": "B", "name": "Unrated", "tags": []},
+]
+
+
+class TestSnapshotMemo:
+
+    def test_empty_cache(self, db):
+        assert problem_cache.load_cached_problems() == []
+        assert problem_cache.get_problems_cache_age() is None
+        assert not problem_cache.is_problems_cache_valid()
+
+    def test_roundtrip(self, db):
+        problem_cache.save_problems(PROBLEMS)
+        snapshot_memo.invalidate()
+        assert problem_cache.load_cached_problems() == PROBLEMS
+        assert problem_cache.is_problems_cache_valid()
+
+    def test_decodes_once_per_version(self, db):
+        contest_cache.save_contests([{"id": 1, "startTimeSeconds": 1}])
+        snapshot_memo.invalidate()
+
+        with patch("utils.contest_cache._row_to_contest", wraps=contest_cache._row_to_contest) as decode:
+            first = contest_cache.load_cached_contests()
+            second = contest_cache.load_cached_contests()
+        assert decode.call_count == 1
+        assert first is second
+
+    def test_save_is_write_through(self, db):
+        records = problem_cache.save_problems(PROBLEMS)
+        with patch("utils.problem_cache.json.loads") as loads:
+            assert problem_cache.load_cached_problems() is records
+        loads.assert_not_called()
+
+    def test_row_change_from_elsewhere_is_picked_up(self, db):
+        problem_cache.save_problems(PROBLEMS)
+        with problem_cache.get_connection() as conn:
+            conn.execute("DELETE FROM problems WHERE rating IS NULL")
+            conn.execute("UPDATE cache SET last_updated = last_updated + 1 WHERE key = 'problems_table'")
+        assert problem_cache.load_cached_problems() == PROBLEMS[:1]
+
+
+CONTESTS = [
+    {"id": 1, "name": "Old Round", "phase": "FINISHED", "startTimeSeconds": 1_000},
+    {"id": 2, "name": "New Round", "phase": "FINISHED", "startTimeSeconds": 2_000},
+    {"id": 3, "name": "Upcoming", "phase": "BEFORE"},
+]
+
+RATED = [
+    {"contestId": 1, "index": "A", "name": "Easy", "rating": 800, "tags": []},
+    {"contestId": 1, "index": "B", "name": "Medium", "rating": 1400, "tags": ["dp"]},
+    {"contestId": 2, "index": "A", "name": "Newer Easy", "rating": 900, "tags": []},
+    {"contestId": 2, "index": "B", "name": "Newer Unrated", "tags": []},
+    {"contestId": 3, "index": "A", "name": "Not Started", "rating": 1000, "tags": []},
+]
+
+
+class TestTables:
+
+    def test_contest_roundtrip(self, db):
+        contest_cache.save_contests(CONTESTS)
+        snapshot_memo.invalidate()
+        assert contest_cache.load_cached_contests() == CONTESTS
+
+    def test_save_drops_legacy_blob(self, db):
+        with problem_cache.get_connection() as conn:
+            conn.execute("INSERT INTO cache (key, data, last_updated) VALUES ('problems', '[]', 0)")
+        problem_cache.save_problems(RATED)
+        with problem_cache.get_connection() as conn:
+            keys = {row[0] for row in conn.execute("SELECT key FROM cache")}
+        assert keys == {"problems_table"}
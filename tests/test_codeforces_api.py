@@ -0,0 +1,702 @@
+"""Tests for the CodeforcesAPI HTTP layer"""
+import asyncio
+import json
+from unittest.mock import patch, AsyncMock
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from config.settings import CACHE_TTL_SECONDS, CACHE_HARD_EXPIRY_SECONDS
+from utils.codeforces_api import CodeforcesAPI, PoolStats
+from utils.request_scheduler import (
+    RequestScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND
+)
+from utils.submission_tracker import SubmissionTracker
+from utils.problem_record import pack_problem_id
+from utils.problem_stream import ProblemStreamParser
+from utils.submission_stream import SubmissionStreamParser, solved_entry
+from tests.cf_standin import CodeforcesStandIn, synthetic_fixtures
+from utils.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+async def _start_server(handler):
+    app = web.Application()
+    app.router.add_get("/api/{method}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+class _FastAPITest:
+    """Runs CodeforcesAPI without the production rate limit"""
+
+    def setup_method(self):
+        CodeforcesAPI._pool_stats = PoolStats()
+        self._scheduler, self._breaker = CodeforcesAPI.scheduler, CodeforcesAPI.breaker
+        CodeforcesAPI.scheduler = RequestScheduler(rate=1000, burst=1000)
+        CodeforcesAPI.breaker = CircuitBreaker()
+
+    def teardown_method(self):
+        CodeforcesAPI.scheduler, CodeforcesAPI.breaker = self._scheduler, self._breaker
+        run(CodeforcesAPI.close_session())
+
+
+# ──────────────── Session Pool Tests ────────────────
+
+class TestSessionPool(_FastAPITest):
+
+    def test_connections_are_reused(self):
+        async def handler(request):
+            return web.json_response({"status": "OK", "result": []})
+
+        async def scenario():
+            server = await _start_server(handler)
+            try:
+                for _ in range(3):
+                    data = await CodeforcesAPI.fetch(str(server.make_url("/api/contest.list")))
+                    assert data["status"] == "OK"
+                return CodeforcesAPI.pool_stats()
+            finally:
+                await server.close()
+
+        stats = run(scenario())
+        assert stats["handshakes"] == 1
+        assert stats["reused"] == 2
+        assert stats["open_connections"] == 1
+
+    def test_close_session_is_idempotent(self):
+        async def scenario():
+            session = await CodeforcesAPI.start_session()
+            assert await CodeforcesAPI.start_session() is session
+            await CodeforcesAPI.close_session()
+            await CodeforcesAPI.close_session()
+            return session
+
+        session = run(scenario())
+        assert session.closed
+        assert CodeforcesAPI.pool_stats()["open_connections"] == 0
+
+
+# ──────────────── Single-flight Tests ────────────────
+
+class TestSingleFlight(_FastAPITest):
+
+    def test_identical_requests_share_one_download(self):
+        hits = []
+
+        async def handler(request):
+            hits.append(request.match_info["method"])
+            await asyncio.sleep(0.05)
+            return web.json_response({"status": "OK", "result": {"problems": [{"contestId": 1, "name": "A"}]}})
+
+        async def scenario():
+            server = await _start_server(handler)
+            base = str(server.make_url("/api/"))
+            try:
+                with patch("utils.codeforces_api.CODEFORCES_API_BASE", base), \
+                     patch("utils.codeforces_api.get_problems_cache_age", return_value=None), \
+                     patch("utils.codeforces_api.save_problems", side_effect=lambda p: p) as save:
+                    results = await asyncio.gather(*(CodeforcesAPI.get_problems() for _ in range(5)))
+                    return results, save.call_count
+            finally:
+                await server.close()
+
+        results, saves = run(scenario())
+        assert hits == ["problemset.problems"]
+        assert saves == 1
+        assert all(r == [{"contestId": 1, "name": "A"}] for r in results)
+        assert CodeforcesAPI._inflight == {}
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return web.json_response({"status": "OK", "result": []})
+
+        async def scenario():
+            server = await _start_server(handler)
+            url = str(server.make_url("/api/contest.list"))
+            try:
+                first = asyncio.ensure_future(CodeforcesAPI.fetch(url))
+                second = asyncio.ensure_future(CodeforcesAPI.fetch(url))
+                await asyncio.sleep(0.01)
+                first.cancel()
+                return await second
+            finally:
+                await server.close()
+
+        assert run(scenario()) == {"status": "OK", "result": []}
+
+
+# ──────────────── Retry / Circuit Breaker Tests ────────────────
+
+class TestRetries(_FastAPITest):
+
+    def _fetch_with_failures(self, failures, status=500):
+        hits = []
+
+        async def handler(request):
+            hits.append(1)
+            if len(hits) <= failures:
+                return web.Response(status=status)
+            return web.json_response({"status": "OK", "result": []})
+
+        async def scenario():
+            server = await _start_server(handler)
+            try:
+                with patch("utils.codeforces_api.CODEFORCES_RETRY_BACKOFF", 0):
+                    return await CodeforcesAPI.fetch(str(server.make_url("/api/contest.list")))
+            finally:
+                await server.close()
+
+        return run(scenario()), len(hits)
+
+    def test_transient_error_is_retried(self):
+        data, hits = self._fetch_with_failures(2)
+        assert data == {"status": "OK", "result": []}
+        assert hits == 3
+
+    def test_gives_up_after_max_retries(self):
+        data, hits = self._fetch_with_failures(10)
+        assert data is None
+        assert hits == 3
+
+    def test_client_errors_are_not_retried(self):
+        data, hits = self._fetch_with_failures(10, status=404)
+        assert data is None
+        assert hits == 1
+
+    def test_timeout_is_retried(self):
+        hits = []
+
+        async def handler(request):
+            hits.append(1)
+            if len(hits) == 1:
+                await asyncio.sleep(1)
+            return web.json_response({"status": "OK", "result": []})
+
+        async def scenario():
+            server = await _start_server(handler)
+            try:
+                with patch("utils.codeforces_api.CODEFORCES_RETRY_BACKOFF", 0), \
+                     patch("utils.codeforces_api.CODEFORCES_TIMEOUT_SECONDS", 0.1):
+                    return await CodeforcesAPI.fetch(str(server.make_url("/api/user.status")))
+            finally:
+                await server.close()
+
+        assert run(scenario())["status"] == "OK"
+        assert len(hits) == 2
+
+    def test_open_breaker_fails_fast(self):
+        CodeforcesAPI.breaker = CircuitBreaker(min_calls=3)
+        for _ in range(3):
+            CodeforcesAPI.breaker.record_failure()
+        data, hits = self._fetch_with_failures(0)
+        assert data is None
+        assert hits == 0
+
+
+class TestCircuitBreaker:
+
+    def test_opens_at_failure_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=0.5, window=10, min_calls=4)
+        for outcome in (True, False, True):
+            breaker.record_success() if outcome else breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert breaker.allow() is False
+        assert breaker.stats()["trips"] == 1
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=30)
+        with patch("utils.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+        with patch("utils.circuit_breaker.time.monotonic", return_value=131.0):
+            assert breaker.allow() is True
+            assert breaker.state == STATE_HALF_OPEN
+            assert breaker.allow() is False  # only one probe at a time
+            breaker.record_failure()
+            assert breaker.state == STATE_OPEN
+        with patch("utils.circuit_breaker.time.monotonic", return_value=162.0):
+            assert breaker.allow() is True
+            breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow() is True
+
+
+# ──────────────── Stale-while-revalidate Tests ────────────────
+
+SNAPSHOT = [{"contestId": 1, "index": "A"}]
+FRESH = [{"contestId": 2, "index": "B"}]
+
+
+class TestStaleWhileRevalidate:
+
+    def _get_problems(self, age, refreshed):
+        async def scenario():
+            with patch("utils.codeforces_api.get_problems_cache_age", return_value=age), \
+                 patch("utils.codeforces_api.load_cached_problems", return_value=SNAPSHOT), \
+                 patch.object(CodeforcesAPI, "_refresh_problems", AsyncMock(return_value=refreshed)) as refresh:
+                problems = await CodeforcesAPI.get_problems()
+                await asyncio.gather(*CodeforcesAPI._background_tasks)
+                return problems, refresh.await_count
+
+        return run(scenario())
+
+    def test_fresh_snapshot_served_without_refresh(self):
+        assert self._get_problems(60, FRESH) == (SNAPSHOT, 0)
+
+    def test_stale_snapshot_served_while_refreshing(self):
+        assert self._get_problems(CACHE_TTL_SECONDS + 1, FRESH) == (SNAPSHOT, 1)
+
+    def test_expired_snapshot_waits_for_refresh(self):
+        assert self._get_problems(CACHE_HARD_EXPIRY_SECONDS + 1, FRESH) == (FRESH, 1)
+
+    def test_expired_snapshot_used_when_refresh_fails(self):
+        assert self._get_problems(CACHE_HARD_EXPIRY_SECONDS + 1, []) == (SNAPSHOT, 1)
+
+    def test_no_snapshot_and_no_network(self):
+        assert self._get_problems(None, []) == ([], 1)
+
+    def test_concurrent_callers_share_one_snapshot_read(self):
+        async def scenario():
+            with patch("utils.codeforces_api.get_problems_cache_age", return_value=60), \
+                 patch("utils.codeforces_api.load_cached_problems", return_value=SNAPSHOT) as load:
+                results = await asyncio.gather(*(CodeforcesAPI.get_problems() for _ in range(8)))
+                return results, load.call_count
+
+        results, loads = run(scenario())
+        assert all(r is SNAPSHOT for r in results)
+        assert loads == 1
+
+
+# ──────────────── Streaming problemset.problems Tests ────────────────
+
+class TestProblemStreamParser:
+
+    PAYLOAD = {
+        "status": "OK",
+        "result": {
+            "problems": [
+                {"contestId": 1, "index": "A", "name": "Théâtre Square", "type": "PROGRAMMING",
+                 "points": 500.0, "rating": 1000, "tags": ["math"]},
+                {"contestId": 2, "index": "B1", "name": "Brackets [easy]", "type": "PROGRAMMING",
+                 "tags": []},
+            ],
+            "problemStatistics": [{"contestId": 1, "index": "A", "solvedCount": 99999}],
+        },
+    }
+
+    def _parse(self, body, chunk_size):
+        parser = ProblemStreamParser()
+        problems = []
+        for i in range(0, len(body), chunk_size):
+            problems.extend(parser.feed(body[i:i + chunk_size]))
+        return problems, parser.done
+
+    def test_parses_and_slims_across_any_chunking(self):
+        body = json.dumps(self.PAYLOAD, ensure_ascii=False).encode()
+        expected = [
+            {"contestId": 1, "index": "A", "name": "Théâtre Square", "rating": 1000, "tags": ["math"]},
+            {"contestId": 2, "index": "B1", "name": "Brackets [easy]", "tags": []},
+        ]
+        for chunk_size in (1, 3, 7, 64, len(body)):
+            assert self._parse(body, chunk_size) == (expected, True)
+
+    def test_failed_status_is_not_done(self):
+        body = json.dumps({"status": "FAILED", "comment": "Call limit exceeded"}).encode()
+        assert self._parse(body, 5) == ([], False)
+
+    def test_submissions_reduce_to_solved_entries(self):
+        body = json.dumps({"status": "OK", "result": [
+            {"id": 3, "problem": {"contestId": 1, "index": "A", "name": "[result]"}, "verdict": "OK",
+             "author": {"members": [{"handle": "tourist"}]}},
+            {"id": 2, "problem": {"contestId": 1, "index": "B"}, "verdict": "WRONG_ANSWER"},
+            {"id": 1, "problem": {"index": "A"}, "verdict": "OK"},
+        ]}).encode()
+        for chunk_size in (1, 5, len(body)):
+            parser = SubmissionStreamParser()
+            entries = []
+            for i in range(0, len(body), chunk_size):
+                entries.extend(parser.feed(body[i:i + chunk_size]))
+            assert parser.done
+            assert entries == [(3, pack_problem_id(1, "A")), (2, None), (1, pack_problem_id(None, "A"))]
+
+
+# ──────────────── user.info Batching Tests ────────────────
+
+USERS = {
+    "tourist": {"handle": "tourist", "rating": 3800},
+    "petr": {"handle": "Petr", "rating": 3000},
+    "newbie": {"handle": "newbie"},
+}
+
+
+class TestUserInfoBatching(_FastAPITest):
+
+    def _lookup(self, handles):
+        requests = []
+
+        async def handler(request):
+            asked = request.query["handles"].split(";")
+            requests.append(asked)
+            for h in asked:
+                if h.lower() not in USERS:
+                    return web.json_response(
+                        {"status": "FAILED", "comment": f"handles: User with handle {h} not found"},
+                        status=400
+                    )
+            return web.json_response({"status": "OK", "result": [USERS[h.lower()] for h in asked]})
+
+        async def scenario():
+            server = await _start_server(handler)
+            try:
+                with patch("utils.codeforces_api.CODEFORCES_API_BASE", str(server.make_url("/api/"))):
+                    return await CodeforcesAPI.get_user_ratings(handles)
+            finally:
+                await server.close()
+
+        return run(scenario()), requests
+
+    def test_concurrent_lookups_share_one_call(self):
+        ratings, requests = self._lookup(["tourist", "PETR", "newbie", "tourist"])
+        assert ratings == {"tourist": 3800, "PETR": 3000, "newbie": None}
+        assert len(requests) == 1
+        assert sorted(requests[0]) == ["PETR", "newbie", "tourist"]
+
+    def test_unknown_handle_is_dropped_and_retried(self):
+        ratings, requests = self._lookup(["tourist", "ghost"])
+        assert ratings == {"tourist": 3800, "ghost": None}
+        assert requests == [["tourist", "ghost"], ["tourist"]]
+
+
+# ──────────────── Submission Tracker Tests ────────────────
+
+def _sub(sub_id, contest_id, index, verdict="WRONG_ANSWER"):
+    return {
+        "id": sub_id,
+        "creationTimeSeconds": 1_700_000_000 + sub_id,
+        "problem": {"contestId": contest_id, "index": index},
+        "verdict": verdict,
+    }
+
+
+class FakeUserStatus:
+    """user.status stand-in: newest first, records every (start, count) asked"""
+
+    def __init__(self, submissions):
+        self.submissions = list(submissions)
+        self.calls = []
+
+    def submit(self, sub):
+        self.submissions.insert(0, sub)
+
+    async def __call__(self, handle, start, count):
+        self.calls.append((start, count))
+        await asyncio.sleep(0)
+        return self.submissions[start - 1:start - 1 + count]
+
+    async def history(self, handle):
+        """The whole history, reduced the way read_solved does"""
+        self.calls.append((1, None))
+        await asyncio.sleep(0)
+        entries = [solved_entry(s) for s in self.submissions]
+        return max((i for i, _ in entries), default=0), {p for _, p in entries if p is not None}
+
+
+class TestSubmissionTracker:
+
+    def test_first_sync_reads_initial_window(self):
+        feed = FakeUserStatus([_sub(i, 100, "A") for i in range(30, 0, -1)])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=20, page_size=5)
+
+        new = run(tracker.sync("alice"))
+        assert len(new) == 20
+        assert feed.calls == [(1, 20)]
+        assert tracker.watermark("alice") == 30
+
+    def test_incremental_sync_only_reads_new_pages(self):
+        feed = FakeUserStatus([_sub(1, 100, "A")])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=20, page_size=2)
+        run(tracker.sync("alice"))
+        feed.calls.clear()
+
+        for i in range(2, 9):
+            feed.submit(_sub(i, 100, "B", "OK" if i == 2 else "WRONG_ANSWER"))
+        new = run(tracker.sync("alice"))
+
+        # 7 new submissions: pages of 2, 4, then 8 reaches the watermark
+        assert [s["id"] for s in new] == [8, 7, 6, 5, 4, 3, 2]
+        assert feed.calls == [(1, 2), (3, 4), (7, 8)]
+        # The AC was pushed out of any fixed-size "latest N" window but is kept
+        assert tracker.first_ac("alice", 100, "B")["id"] == 2
+
+    def test_nothing_new_costs_one_small_page(self):
+        feed = FakeUserStatus([_sub(i, 100, "A") for i in range(5, 0, -1)])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=20, page_size=3)
+        run(tracker.sync("alice"))
+        feed.calls.clear()
+
+        assert run(tracker.sync("ALICE")) == []
+        assert feed.calls == [(1, 3)]
+
+    def test_failed_page_keeps_watermark(self):
+        feed = FakeUserStatus([_sub(1, 100, "A")])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=20, page_size=1)
+        run(tracker.sync("alice"))
+
+        feed.submit(_sub(2, 100, "A"))
+        feed.submit(_sub(3, 100, "C", "COMPILATION_ERROR"))
+        pages = iter([[feed.submissions[0]], None])
+
+        async def flaky(handle, start, count):
+            return next(pages)
+
+        tracker._fetch_page = flaky
+        run(tracker.sync("alice"))
+        assert tracker.watermark("alice") == 1
+        assert tracker.has_compilation_error("alice", 100, "C")
+
+        tracker._fetch_page = feed
+        assert [s["id"] for s in run(tracker.sync("alice"))] == [3, 2]
+        assert tracker.watermark("alice") == 3
+
+    def test_keeps_recent_handles_and_slim_acs(self):
+        feed = FakeUserStatus([_sub(2, 100, "A", "OK"), _sub(1, 100, "A", "OK")])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=20, max_handles=2)
+        for handle in ("alice", "bob", "alice", "carol"):
+            run(tracker.sync(handle))
+
+        assert tracker.first_ac("alice", 100, "A") == {"id": 1, "creationTimeSeconds": 1_700_000_001}
+        assert tracker.watermark("bob") is None  # least recently used, dropped for carol
+        assert tracker.watermark("carol") == 2
+
+    def test_history_fills_solved_set_once(self):
+        feed = FakeUserStatus([
+            _sub(3, 100, "B"), _sub(2, 100, "A", "OK"), _sub(1, 7, "C1", "OK"),
+        ])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=20, page_size=2)
+
+        assert run(tracker.load_history("alice"))
+        assert run(tracker.load_history("Alice"))
+        assert feed.calls == [(1, None)]
+        assert tracker.solved("alice") == {pack_problem_id(100, "A"), pack_problem_id(7, "C1")}
+        assert tracker.watermark("alice") == 3
+
+        # Later ACs arrive through the ordinary incremental sync
+        feed.submit(_sub(4, 100, "B", "OK"))
+        assert [s["id"] for s in run(tracker.sync("alice"))] == [4]
+        assert pack_problem_id(100, "B") in tracker.solved("alice")
+
+    def test_synced_within_follows_complete_syncs(self):
+        now = [100.0]
+        feed = FakeUserStatus([_sub(1, 100, "A", "OK")])
+        tracker = SubmissionTracker(feed, feed.history, clock=lambda: now[0])
+        assert not tracker.synced_within("alice", 60)
+
+        run(tracker.load_history("alice"))
+        now[0] += 30
+        assert tracker.synced_within("Alice", 60)
+        now[0] += 30
+        assert not tracker.synced_within("alice", 60)
+
+        async def failing(handle, start, count):
+            return None
+
+        tracker._fetch_page = failing
+        run(tracker.sync("alice"))
+        assert not tracker.synced_within("alice", 60)
+        tracker._fetch_page = feed
+        run(tracker.sync("alice"))
+        assert tracker.synced_within("alice", 60)
+
+    def test_slow_solved_sets_fall_back_to_what_is_known(self):
+        feed = FakeUserStatus([_sub(2, 100, "B", "OK"), _sub(1, 100, "A", "OK")])
+        release = asyncio.Event()
+
+        async def slow_history(handle):
+            await release.wait()
+            return await feed.history(handle)
+
+        tracker = SubmissionTracker(feed, slow_history, initial_count=1)
+
+        async def scenario():
+            with patch.object(CodeforcesAPI, "submission_tracker", tracker):
+                await tracker.sync("alice")
+                known = [set(s) for s in await CodeforcesAPI.get_solved_sets(["alice", "bob"], timeout=0.01)]
+                # The history read carries on and is there for the next duel
+                release.set()
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+                return known, tracker.has_history("alice")
+
+        known, loaded = run(scenario())
+        assert known == [{pack_problem_id(100, "B")}, set()]
+        assert loaded
+
+    def test_history_loaded_during_first_sync_is_kept(self):
+        feed = FakeUserStatus([_sub(2, 100, "A", "OK"), _sub(1, 100, "B", "OK")])
+        tracker = SubmissionTracker(feed, feed.history, initial_count=1)
+
+        async def scenario():
+            # The history lands while the first sync's page is in flight
+            await asyncio.gather(tracker.load_history("alice"), tracker.sync("alice"))
+
+        run(scenario())
+        assert tracker.solved("alice") == {pack_problem_id(100, "A"), pack_problem_id(100, "B")}
+        assert run(tracker.load_history("alice"))
+        assert len(feed.calls) == 2
+
+
+# ──────────────── End-to-end Against the Stand-in ────────────────
+
+class TestAgainstStandIn(_FastAPITest):
+
+    def _run(self, scenario, **options):
+        async def wrapper():
+            async with CodeforcesStandIn(synthetic_fixtures(contests=20), seed=0, **options) as standin:
+                with patch("utils.codeforces_api.CODEFORCES_API_BASE", standin.base_url), \
+                     patch("utils.codeforces_api.CODEFORCES_RETRY_BACKOFF", 0), \
+                     patch("utils.codeforces_api.get_problems_cache_age", return_value=None), \
+                     patch("utils.codeforces_api.get_contest_cache_age", return_value=None), \
+                     patch("utils.codeforces_api.save_problems", side_effect=lambda p: p), \
+                     patch("utils.codeforces_api.save_contests"):
+                    return await scenario(standin)
+
+        return run(wrapper())
+
+    def test_full_http_path(self):
+        async def scenario(standin):
+            problems = await CodeforcesAPI.get_problems()
+            contests = await CodeforcesAPI.get_contests()
+            ratings = await CodeforcesAPI.get_user_ratings(["tourist", "petr", "ghost"])
+            submission = standin.submit("tourist", problems[0]["contestId"], problems[0]["index"])
+            first_ac = await CodeforcesAPI.get_first_ac(
+                "tourist", problems[0]["contestId"], problems[0]["index"]
+            )
+            return problems, contests, ratings, submission, first_ac
+
+        problems, contests, ratings, submission, first_ac = self._run(scenario)
+        assert len(problems) == 120
+        assert set(problems[0]) <= {"contestId", "index", "name", "rating", "tags"}
+        assert len(contests) == 20
+        assert ratings["ghost"] is None and ratings["tourist"] is not None
+        assert first_ac["id"] <= submission["id"]
+
+    def test_solved_sets_stream_history_then_sync(self):
+        tracker = SubmissionTracker(CodeforcesAPI.fetch_submission_page, CodeforcesAPI.fetch_solved_history)
+
+        async def scenario(standin):
+            expected = {
+                pack_problem_id(s["problem"]["contestId"], s["problem"]["index"])
+                for s in standin.fixtures["submissions"]["petr"] if s["verdict"] == "OK"
+            }
+            with patch.object(CodeforcesAPI, "submission_tracker", tracker), \
+                 patch("utils.codeforces_api.SOLVED_SYNC_FRESH_SECONDS", 0):
+                problems = await CodeforcesAPI.get_problems()
+                first = set((await CodeforcesAPI.get_solved_sets(["petr"]))[0])
+                fresh = next(p for p in problems if pack_problem_id(p["contestId"], p["index"]) not in first)
+                standin.submit("petr", fresh["contestId"], fresh["index"])
+                second = (await CodeforcesAPI.get_solved_sets(["petr"]))[0]
+                return expected, first, second, pack_problem_id(fresh["contestId"], fresh["index"]), standin.requests
+
+        expected, first, second, fresh, requests = self._run(scenario)
+        assert first == expected
+        # Solved outside the bot, picked up by the one-page sync
+        assert second == first | {fresh}
+        assert requests["user.status"] == 2
+
+    def test_recently_synced_solved_set_is_reused(self):
+        tracker = SubmissionTracker(CodeforcesAPI.fetch_submission_page, CodeforcesAPI.fetch_solved_history)
+
+        async def scenario(standin):
+            with patch.object(CodeforcesAPI, "submission_tracker", tracker):
+                first = await CodeforcesAPI.get_solved_sets(["petr"])
+                second = await CodeforcesAPI.get_solved_sets(["petr"])
+                return first, second, standin.requests
+
+        first, second, requests = self._run(scenario)
+        assert second == first
+        # The history read just now is fresh enough; no sync for the second duel
+        assert requests["user.status"] == 1
+
+    def test_errors_are_retried(self):
+        async def scenario(standin):
+            results = [await CodeforcesAPI.get_user_submissions("petr", 5) for _ in range(10)]
+            return results, standin.errors
+
+        results, errors = self._run(scenario, error_rate=0.3)
+        assert errors > 0
+        assert all(len(r) == 5 for r in results)
+
+    def test_call_limit_is_penalized_and_retried(self):
+        CodeforcesAPI.scheduler = RequestScheduler(rate=15, burst=2)
+
+        async def scenario(standin):
+            with patch.object(CodeforcesAPI.scheduler, "penalize", wraps=CodeforcesAPI.scheduler.penalize) as penalize:
+                results = await asyncio.gather(*(
+                    CodeforcesAPI.get_user_submissions(h, 1) for h in ("tourist", "petr", "newbie")
+                ))
+                return results, standin.rate_limited, penalize.call_count
+
+        results, rate_limited, penalties = self._run(scenario, min_interval=0.05)
+        assert rate_limited > 0
+        assert penalties == rate_limited
+        assert all(len(r) == 1 for r in results)
+
+
+# ──────────────── Request Scheduler Tests ────────────────
+
+class TestRequestScheduler:
+
+    def test_interactive_lane_runs_first(self):
+        scheduler = RequestScheduler(rate=50, burst=1)
+        order = []
+
+        async def call(name, priority):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        async def scenario():
+            await scheduler.acquire(PRIORITY_BACKGROUND)  # drain the bucket
+            tasks = [asyncio.ensure_future(call("bg1", PRIORITY_BACKGROUND))]
+            tasks.append(asyncio.ensure_future(call("bg2", PRIORITY_BACKGROUND)))
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(call("check", PRIORITY_INTERACTIVE)))
+            await asyncio.gather(*tasks)
+
+        run(scenario())
+        assert order == ["check", "bg1", "bg2"]
+
+    def test_rate_is_enforced(self):
+        scheduler = RequestScheduler(rate=20, burst=1)
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*(scheduler.acquire() for _ in range(4)))
+            return loop.time() - start
+
+        elapsed = run(scenario())
+        # First token is free, the next three wait 1/20 s each
+        assert elapsed >= 0.14
+
+    def test_cancelled_waiter_is_skipped(self):
+        scheduler = RequestScheduler(rate=50, burst=1)
+
+        async def scenario():
+            await scheduler.acquire()
+            waiter = asyncio.ensure_future(scheduler.acquire(PRIORITY_INTERACTIVE))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await scheduler.acquire(PRIORITY_BACKGROUND)
+
+        run(scenario())
+        stats = scheduler.stats()
+        assert stats["lanes"]["interactive"]["granted"] == 0
+        assert stats["lanes"]["background"]["granted"] == 1
+        assert all(lane["queued"] == 0 for lane in stats["lanes"].values())
@@ -104,30 +104,42 @@ class TestDuelServiceValidation:
 
     def test_valid_challenge(self):
         with patch("services.duel_service.UserRepo") as MockRepo:
-            MockRepo.get_cf_handle.return_value = "handle"
-            error = DuelService.validate_challenge(111, 222, False, 3, 800, 1200)
+            MockRepo.get_cf_handles = AsyncMock(return_value={111: "alice", 222: "bob"})
+            error = asyncio.get_event_loop().run_until_complete(
+                DuelService.validate_challenge(111, 222, False, 3, 800, 1200)
+            )
             assert error is None
 
     def test_challenge_bot(self):
-        error = DuelService.validate_challenge(111, 222, True, 3, 800, 1200)
+        error = asyncio.get_event_loop().run_until_complete(
+            DuelService.validate_challenge(111, 222, True, 3, 800, 1200)
+        )
         assert "bot" in error.lower()
 
     def test_challenge_self(self):
-        error = DuelService.validate_challenge(111, 111, False, 3, 800, 1200)
+        error = asyncio.get_event_loop().run_until_complete(
+            DuelService.validate_challenge(111, 111, False, 3, 800, 1200)
+        )
         assert "yourself" in error.lower()
 
     def test_invalid_problem_count(self):
-        error = DuelService.validate_challenge(111, 222, False, 0, 800, 1200)
+        error = asyncio.get_event_loop().run_until_complete(
+            DuelService.validate_challenge(111, 222, False, 0, 800, 1200)
+        )
         assert "problems" in error.lower()
 
     def test_invalid_rating_range(self):
-        error = DuelService.validate_challenge(111, 222, False, 3, 1500, 800)
+        error = asyncio.get_event_loop().run_until_complete(
+            DuelService.validate_challenge(111, 222, False, 3, 1500, 800)
+        )
         assert "rating" in error.lower()
 
     def test_unlinked_challenger(self):
         with patch("services.duel_service.UserRepo") as MockRepo:
-            MockRepo.get_cf_handle.side_effect = lambda uid: None
-            error = DuelService.validate_challenge(111, 222, False, 3, 800, 1200)
+            MockRepo.get_cf_handles = AsyncMock(return_value={111: None, 222: "bob"})
+            error = asyncio.get_event_loop().run_until_complete(
+                DuelService.validate_challenge(111, 222, False, 3, 800, 1200)
+            )
             assert "link" in error.lower()
 
 
@@ -153,3 +165,30 @@ class TestDuelServiceCheckSolution:
             service.check_solution(111)
         )
         assert result.already_solved is True
+
+    def test_earliest_ac_wins(self, service):
+        duel = Duel(111, 222, 2, 800, 1200, 30, handles={111: "alice", 222: "bob"})
+        duel.problems = [
+            {"contestId": 1, "index": "A", "rating": 800},
+            {"contestId": 2, "index": "B", "rating": 1200},
+        ]
+        service.repo.start_duel(duel)
+        first_acs = {
+            "alice": {"creationTimeSeconds": 200},
+            "bob": {"creationTimeSeconds": 100},
+        }
+
+        with patch("services.duel_service.UserRepo") as MockRepo, \
+             patch("services.duel_service.CodeforcesAPI") as MockCFAPI:
+            MockCFAPI.get_first_ac = AsyncMock(side_effect=lambda h, cid, idx: first_acs[h])
+            result_duel, result = asyncio.get_event_loop().run_until_complete(
+                service.check_solution(111)
+            )
+
+        MockCFAPI.get_first_ac.assert_any_await("alice", 1, "A")
+        assert not MockRepo.mock_calls  # handles were resolved when the duel was created
+        assert result.winner_id == 222
+        assert result.loser_id == 111
+        assert result.points == 800
+        assert duel.scores == {111: 0, 222: 800}
+        assert duel.current_problem_idx == 1
@@ -3,6 +3,9 @@ import pytest
 import asyncio
 from unittest.mock import patch, AsyncMock
 from services.problem_service import ProblemService
+from utils.problem_index import ProblemIndex
+from utils.name_index import NameIndex
+from utils.tag_query import parse_tags
 
 
 MOCK_PROBLEMS = [
@@ -18,7 +21,7 @@ class TestProblemService:
     @patch("services.problem_service.CodeforcesAPI")
     @patch("services.problem_service.UserRepo")
     def test_suggest_with_explicit_rating(self, MockUserRepo, MockCFAPI):
-        MockCFAPI.get_problems = AsyncMock(return_value=MOCK_PROBLEMS)
+        MockCFAPI.get_problem_index = AsyncMock(return_value=ProblemIndex(MOCK_PROBLEMS))
 
         problem, rating = asyncio.get_event_loop().run_until_complete(
             ProblemService.get_suggested_problem(discord_id=111, rating=850)
@@ -31,7 +34,7 @@ class TestProblemService:
     @patch("services.problem_service.CodeforcesAPI")
     @patch("services.problem_service.UserRepo")
     def test_suggest_no_problems_found(self, MockUserRepo, MockCFAPI):
-        MockCFAPI.get_problems = AsyncMock(return_value=MOCK_PROBLEMS)
+        MockCFAPI.get_problem_index = AsyncMock(return_value=ProblemIndex(MOCK_PROBLEMS))
 
         problem, info = asyncio.get_event_loop().run_until_complete(
             ProblemService.get_suggested_problem(discord_id=111, rating=3000)
@@ -43,9 +46,9 @@ class TestProblemService:
     @patch("services.problem_service.CodeforcesAPI")
     @patch("services.problem_service.UserRepo")
     def test_suggest_infers_rating_from_handle(self, MockUserRepo, MockCFAPI):
-        MockUserRepo.get_cf_handle.return_value = "tourist"
+        MockUserRepo.get_cf_handle = AsyncMock(return_value="tourist")
         MockCFAPI.get_user_rating = AsyncMock(return_value=900)
-        MockCFAPI.get_problems = AsyncMock(return_value=MOCK_PROBLEMS)
+        MockCFAPI.get_problem_index = AsyncMock(return_value=ProblemIndex(MOCK_PROBLEMS))
 
         problem, rating = asyncio.get_event_loop().run_until_complete(
             ProblemService.get_suggested_problem(discord_id=111, rating=None)
@@ -58,11 +61,10 @@ class TestProblemService:
     @patch("services.problem_service.CodeforcesAPI")
     @patch("services.problem_service.UserRepo")
     def test_suggest_random_rating_when_no_handle(self, MockUserRepo, MockCFAPI, mock_random):
-        MockUserRepo.get_cf_handle.return_value = None
-        MockCFAPI.get_problems = AsyncMock(return_value=MOCK_PROBLEMS)
+        MockUserRepo.get_cf_handle = AsyncMock(return_value=None)
+        MockCFAPI.get_problem_index = AsyncMock(return_value=ProblemIndex(MOCK_PROBLEMS))
         # Force the "random" rating to be 900 so it matches mock problems
         mock_random.randint.return_value = 900
-        mock_random.choice.side_effect = lambda lst: lst[0]
 
         problem, rating = asyncio.get_event_loop().run_until_complete(
             ProblemService.get_suggested_problem(discord_id=111, rating=None)
@@ -71,3 +73,42 @@ class TestProblemService:
         assert problem is not None
         assert rating == 900
         assert isinstance(rating, int)
+
+    @patch("services.problem_service.CodeforcesAPI")
+    @patch("services.problem_service.UserRepo")
+    def test_suggest_with_tags(self, MockUserRepo, MockCFAPI):
+        tagged = [dict(p, tags=["dp"] if p["index"] == "B" else ["math"]) for p in MOCK_PROBLEMS]
+        MockCFAPI.get_problem_index = AsyncMock(return_value=ProblemIndex(tagged))
+
+        problem, _ = asyncio.get_event_loop().run_until_complete(
+            ProblemService.get_suggested_problem(discord_id=111, rating=900, tags=parse_tags("dp"))
+        )
+        assert problem["name"] == "Boring Apartments"
+
+        problem, info = asyncio.get_event_loop().run_until_complete(
+            ProblemService.get_suggested_problem(discord_id=111, rating=900, tags=parse_tags("graphs"))
+        )
+        assert problem is None
+        assert "`graphs`" in info
+
+    @patch("services.problem_service.CodeforcesAPI")
+    def test_find_by_name(self, MockCFAPI):
+        MockCFAPI.get_name_index = AsyncMock(return_value=NameIndex(MOCK_PROBLEMS))
+
+        matches, error = asyncio.get_event_loop().run_until_complete(
+            ProblemService.find_problems("boring apartment")
+        )
+
+        assert error is None
+        assert matches[0][0]["name"] == "Boring Apartments"
+
+    @patch("services.problem_service.CodeforcesAPI")
+    def test_find_outside_rating_range(self, MockCFAPI):
+        MockCFAPI.get_name_index = AsyncMock(return_value=NameIndex(MOCK_PROBLEMS))
+
+        matches, error = asyncio.get_event_loop().run_until_complete(
+            ProblemService.find_problems("watermelon", 1000, 1200)
+        )
+
+        assert matches is None
+        assert "No problems rated 1000-1200" in error
@@ -0,0 +1,507 @@
+"""Tests for the in-memory problem indexes"""
+import asyncio
+import random
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock
+from utils.codeforces_api import CodeforcesAPI
+from utils.problem_index import ProblemIndex, EligiblePool
+from utils.name_index import NameIndex, normalize
+from utils.problem_record import ProblemRecord, tag_bit, tag_names, pack_problem_id
+from utils.problem_selector import ProblemSelector
+from utils.problem_set_pool import ProblemSetPool
+from utils.tag_query import parse_tags
+from models.duel import Duel
+from models.round import Round
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+PROBLEMS = [
+    {"contestId": 1, "index": "A", "name": "Easy", "rating": 800},
+    {"contestId": 1, "index": "B", "name": "Unrated"},
+    {"contestId": 2, "index": "A", "name": "Medium", "rating": 1400},
+    {"contestId": 2, "index": "B", "name": "Also Easy", "rating": 800},
+    {"contestId": 3, "index": "A", "name": "Hard", "rating": 2400},
+]
+
+CONTESTS = [
+    {"id": 1, "startTimeSeconds": 1_000},
+    {"id": 2, "startTimeSeconds": 2_000},
+    {"id": 3},
+]
+
+
+class TestProblemIndex:
+
+    def test_unrated_are_left_out(self):
+        assert len(ProblemIndex(PROBLEMS)) == 4
+
+    def test_range_is_inclusive_and_sorted(self):
+        index = ProblemIndex(PROBLEMS)
+        assert [p["name"] for p in index.iter_range(800, 1400)] == ["Easy", "Also Easy", "Medium"]
+        assert index.count(801, 1399) == 0
+        assert index.count(2400, 2400) == 1
+        assert index.count(1500, 1000) == 0
+
+    def test_random_stays_in_range(self):
+        index = ProblemIndex(PROBLEMS)
+        rng = random.Random(0)
+        for _ in range(20):
+            assert index.random(700, 900, rng)["rating"] == 800
+        assert index.random(3000, 3500, rng) is None
+
+    def test_sample_is_distinct_and_capped(self):
+        index = ProblemIndex(PROBLEMS)
+        picked = index.sample(0, 1500, 10, random.Random(1))
+        assert len(picked) == 3
+        assert len({p["name"] for p in picked}) == 3
+        assert index.sample(3000, 3500, 2) == []
+
+
+class TestGetProblemIndex:
+
+    def teardown_method(self):
+        CodeforcesAPI._problem_index = None
+        CodeforcesAPI._eligible_pool = None
+
+    def test_rebuilt_only_when_problems_change(self):
+        problems = list(PROBLEMS)
+        with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=problems)):
+            first = run(CodeforcesAPI.get_problem_index())
+            assert run(CodeforcesAPI.get_problem_index()) is first
+
+        with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=list(PROBLEMS))):
+            assert run(CodeforcesAPI.get_problem_index()) is not first
+
+    def test_built_once_off_the_event_loop(self):
+        threads = []
+
+        def build(problems):
+            threads.append(threading.get_ident())
+            return ProblemIndex(problems)
+
+        async def scenario():
+            return await asyncio.gather(*(CodeforcesAPI.get_problem_index() for _ in range(3)))
+
+        with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=list(PROBLEMS))), \
+             patch("utils.codeforces_api.build_problem_index", side_effect=build):
+            first, second, third = run(scenario())
+        assert first is second is third
+        assert len(threads) == 1 and threads[0] != threading.get_ident()
+
+
+class TestEligiblePool:
+
+    def teardown_method(self):
+        CodeforcesAPI._eligible_pool = None
+
+    def test_joins_contest_start_times(self):
+        pool = EligiblePool(PROBLEMS, CONTESTS, cutoff_ts=1_500)
+        assert [p["name"] for p in pool.index] == ["Also Easy", "Medium"]
+
+    @patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=PROBLEMS))
+    def test_rebuilt_when_cache_or_cutoff_changes(self):
+        contests = list(CONTESTS)
+        with patch.object(CodeforcesAPI, "get_contests", AsyncMock(return_value=contests)):
+            first = run(CodeforcesAPI.get_eligible_pool())
+            assert run(CodeforcesAPI.get_eligible_pool()) is first
+
+            with patch("utils.codeforces_api.PROBLEM_CUTOFF_DATE", "1960-01-01"):
+                earlier = run(CodeforcesAPI.get_eligible_pool())
+            assert earlier is not first
+            assert len(earlier) == 3
+
+        with patch.object(CodeforcesAPI, "get_contests", AsyncMock(return_value=list(CONTESTS))):
+            assert run(CodeforcesAPI.get_eligible_pool()) is not earlier
+
+
+class TestProblemRecord:
+
+    def test_reads_like_the_api_dict(self):
+        problem = {"contestId": 4, "index": "A", "name": "Watermelon", "rating": 800, "tags": ["math", "brute force"]}
+        record = ProblemRecord.from_dict(problem)
+        assert record == problem
+        assert record.to_dict() == problem
+        assert record["rating"] == 800 and record.get("rating") == 800
+        assert CodeforcesAPI.get_problem_url(record) == CodeforcesAPI.get_problem_url(problem)
+
+    def test_unrated_has_no_rating_key(self):
+        record = ProblemRecord(1, "B", "Unrated")
+        assert "rating" not in record
+        assert record.get("rating", "N/A") == "N/A"
+        assert dict(record) == {"contestId": 1, "index": "B", "name": "Unrated", "tags": []}
+
+    def test_index_letters_and_tags_are_shared(self):
+        a = ProblemRecord.from_dict({"contestId": 1, "index": "".join(["C", "1"]), "name": "x", "tags": ["dp"]})
+        b = ProblemRecord.from_dict({"contestId": 2, "index": "".join(["C", "1"]), "name": "y", "tags": ["dp"]})
+        assert a.index is b.index
+        assert a.tag_mask == b.tag_mask == 1 << tag_bit("dp")
+        assert a["tags"][0] is b["tags"][0]
+
+    def test_tags_first_seen_on_several_threads_get_their_own_bits(self):
+        tags = [f"threaded tag {i}" for i in range(200)]
+        start = threading.Barrier(4)
+        bits = []
+
+        def register(order):
+            start.wait()
+            bits.append({tag: tag_bit(tag) for tag in order})
+
+        threads = [threading.Thread(target=register, args=(tags[::step],)) for step in (1, -1, 1, -1)]
+        # A registry of its own: the real one is shared and capped at 64 tags by the columnar index
+        with patch("utils.problem_record._TAG_BITS", {}), patch("utils.problem_record._TAG_NAMES", []):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            names = {tag: tag_names(1 << bit) for tag, bit in bits[0].items()}
+
+        assert all(b == bits[0] for b in bits)
+        assert len(set(bits[0].values())) == len(tags)
+        assert all(names[tag] == [tag] for tag in tags)
+
+
+def _problemset(contests, ratings):
+    return [
+        {"contestId": cid, "index": chr(ord("A") + j), "name": f"{cid}{j}", "rating": rating}
+        for cid in range(1, contests + 1)
+        for j, rating in enumerate(ratings)
+    ]
+
+
+class TestProblemSelector:
+
+    def test_nearest_slices_walk_outward(self):
+        index = ProblemIndex(_problemset(1, [800, 1000, 1100, 1300]))
+        steps = [[index[i]["rating"] for start, end in step for i in range(start, end)]
+                 for step in index.nearest_slices(1050, 800, 1300)]
+        assert steps == [[1000, 1100], [800, 1300]]
+        assert [len(step) for step in index.nearest_slices(1080, 800, 1100)] == [1, 1, 1]
+
+    def test_targets_are_evenly_spaced_from_distinct_contests(self):
+        selector = ProblemSelector(ProblemIndex(_problemset(10, [800, 1000, 1200, 1400, 1600])))
+        picked = selector.select(3, 800, 1600, random.Random(0))
+        assert [p["rating"] for p in picked] == [800, 1200, 1600]
+        assert len({p["contestId"] for p in picked}) == 3
+
+    def test_same_seed_same_selection(self):
+        selector = ProblemSelector(ProblemIndex(_problemset(50, [800, 1200, 1600])))
+        first = selector.select(5, 800, 1600, random.Random(7))
+        assert selector.select(5, 800, 1600, random.Random(7)) == first
+
+    def test_falls_back_to_used_contests(self):
+        selector = ProblemSelector(ProblemIndex(_problemset(2, [800, 900, 1000])))
+        picked = selector.select(4, 800, 1000, random.Random(0))
+        assert len(picked) == 4
+        assert len({(p["contestId"], p["index"]) for p in picked}) == 4
+
+    def test_not_enough_problems(self):
+        selector = ProblemSelector(ProblemIndex(_problemset(1, [800, 900])))
+        assert selector.select(3, 800, 900) is None
+        assert selector.select(1, 1500, 1600) is None
+
+    def test_duel_and_round_share_the_selector(self):
+        pool = EligiblePool(_problemset(20, [800, 1200, 1600]), [{"id": c, "startTimeSeconds": 0} for c in range(1, 21)], 0)
+        duel = Duel(1, 2, 3, 800, 1600, 30)
+        round_ = Round(1, [2, 3], 3, 800, 1600, 30)
+        with patch.object(CodeforcesAPI, "get_eligible_pool", AsyncMock(return_value=pool)):
+            assert run(duel.generate_problems(random.Random(3)))
+            assert run(round_.generate_problems(random.Random(3)))
+        assert duel.problems == round_.problems
+
+
+class TestProblemSetPool:
+
+    @staticmethod
+    def _pool(**kwargs):
+        calls = []
+
+        async def generate(n, low, high, tags=None, exclude=()):
+            calls.append((n, low, high))
+            return [len(calls)] * n if low <= high else None
+
+        return ProblemSetPool(generate, **kwargs), calls
+
+    def test_hit_pops_and_refills(self):
+        pool, calls = self._pool(shapes=[(2, 800, 1600)], depth=2)
+
+        async def scenario():
+            pool.warm()
+            await pool.wait_refilled()
+            first = await pool.take(2, 800, 1600)
+            await pool.wait_refilled()
+            return first
+
+        assert run(scenario()) == [1, 1]
+        assert len(calls) == 3
+        assert pool.stats()["2x800-1600"] == {"ready": 2, "hits": 1, "misses": 0}
+
+    def test_unpooled_shape_is_promoted_after_misses(self):
+        pool, calls = self._pool(depth=1, promote_after=2)
+
+        async def scenario():
+            await pool.take(1, 800, 900)
+            await pool.wait_refilled()
+            assert pool.stats()["1x800-900"]["ready"] == 0
+            await pool.take(1, 800, 900)
+            await pool.wait_refilled()
+            return await pool.take(1, 800, 900)
+
+        assert run(scenario()) == [3]
+        assert pool.stats()["1x800-900"] == {"ready": 1, "hits": 1, "misses": 2}
+
+    def test_impossible_shape_is_not_refilled(self):
+        pool, calls = self._pool(shapes=[(1, 1600, 800)])
+
+        async def scenario():
+            pool.warm()
+            await pool.wait_refilled()
+            return await pool.take(1, 1600, 800)
+
+        assert run(scenario()) is None
+        assert len(calls) == 2
+
+    @patch.object(CodeforcesAPI, "get_contests", AsyncMock(return_value=CONTESTS))
+    def test_cache_change_clears_ready_sets(self):
+        pool, _ = self._pool(shapes=[(1, 800, 800)])
+        with patch.object(CodeforcesAPI, "problem_sets", pool):
+            with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=list(PROBLEMS))):
+                run(CodeforcesAPI.get_eligible_pool())
+
+            async def warm():
+                pool.warm()
+                await pool.wait_refilled()
+
+            run(warm())
+            assert pool.stats()["1x800-800"]["ready"] == 3
+
+            with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=list(PROBLEMS))):
+                run(CodeforcesAPI.get_eligible_pool())
+            assert pool.stats()["1x800-800"]["ready"] == 0
+        CodeforcesAPI._eligible_pool = None
+
+
+TAGGED = [
+    {"contestId": 1, "index": "A", "name": "Greedy DP", "rating": 1200, "tags": ["dp", "greedy"]},
+    {"contestId": 2, "index": "A", "name": "Pure DP", "rating": 1300, "tags": ["dp"]},
+    {"contestId": 3, "index": "A", "name": "Tree", "rating": 1200, "tags": ["trees", "graphs"]},
+    {"contestId": 4, "index": "A", "name": "Brute", "rating": 1900, "tags": ["brute force", "dp"]},
+    {"contestId": 5, "index": "A", "name": "Untagged", "rating": 1200, "tags": []},
+]
+
+
+class TestTagIndex:
+
+    def _names(self, text, low=0, high=4000):
+        index = ProblemIndex(TAGGED)
+        return sorted(p["name"] for p in index.iter_range(low, high, parse_tags(text)))
+
+    def test_parse(self):
+        query = parse_tags(" DP, !Greedy ,graphs|brute_force")
+        assert query.clauses == (
+            (False, frozenset({"dp"})),
+            (True, frozenset({"greedy"})),
+            (False, frozenset({"graphs", "brute force"})),
+        )
+        assert str(query) == "dp,!greedy,brute_force|graphs"
+        assert parse_tags("") is None
+        for bad in ("dp,", "!", "dp||greedy"):
+            with pytest.raises(ValueError):
+                parse_tags(bad)
+
+    def test_and_or_not(self):
+        assert self._names("dp") == ["Brute", "Greedy DP", "Pure DP"]
+        assert self._names("dp,!greedy") == ["Brute", "Pure DP"]
+        assert self._names("greedy|trees") == ["Greedy DP", "Tree"]
+        assert self._names("!dp") == ["Tree", "Untagged"]
+        assert self._names("brute_force") == ["Brute"]
+        assert self._names("no such tag") == []
+
+    def test_combined_with_rating_range(self):
+        index = ProblemIndex(TAGGED)
+        dp = parse_tags("dp")
+        assert self._names("dp", 1200, 1300) == ["Greedy DP", "Pure DP"]
+        assert index.count(1200, 1300, dp) == 2
+        assert index.random(1800, 2000, random.Random(0), tags=dp)["name"] == "Brute"
+        assert index.random(1400, 1800, tags=dp) is None
+        assert len(index.sample(0, 4000, 5, random.Random(0), tags=dp)) == 3
+
+    def test_selector_respects_tags(self):
+        selector = ProblemSelector(ProblemIndex(TAGGED))
+        picked = selector.select(2, 1200, 1300, random.Random(0), tags=parse_tags("dp"))
+        assert [p["name"] for p in picked] == ["Greedy DP", "Pure DP"]
+        assert selector.select(2, 1200, 1300, tags=parse_tags("trees")) is None
+
+    def test_pool_keys_shapes_by_tags(self):
+        async def generate(n, low, high, tags=None, exclude=()):
+            return [str(tags)]
+
+        pool = ProblemSetPool(generate)
+        assert run(pool.take(1, 800, 900, parse_tags("dp"))) == ["dp"]
+        assert list(pool.stats()) == ["1x800-900 [dp]"]
+
+
+class TestSolvedExclusion:
+
+    def test_selector_skips_solved(self):
+        problems = _problemset(4, [800, 1200])
+        selector = ProblemSelector(ProblemIndex(problems))
+        solved = [{pack_problem_id(c, "A") for c in (1, 2, 3)}, {pack_problem_id(4, "A")}]
+        picked = selector.select(2, 800, 1200, random.Random(0), exclude=solved)
+        assert [p["rating"] for p in picked] == [1200, 1200]
+        assert selector.select(5, 800, 1200, exclude=solved) is None
+
+    def test_pool_skips_sets_with_solved_problems(self):
+        generated = []
+
+        async def generate(n, low, high, tags=None, exclude=()):
+            generated.append(exclude)
+            return [{"contestId": len(generated), "index": "A"}]
+
+        pool = ProblemSetPool(generate, shapes=[(1, 800, 800)], depth=2)
+
+        async def scenario():
+            pool.warm()
+            await pool.wait_refilled()
+            solved = [{pack_problem_id(1, "A")}]
+            first = await pool.take(1, 800, 800, exclude=solved)
+            # Only the contest 1 set is left ready; the refill has not run yet
+            second = await pool.take(1, 800, 800, exclude=solved)
+            await pool.wait_refilled()
+            return first, second
+
+        first, second = run(scenario())
+        assert first == [{"contestId": 2, "index": "A"}]
+        assert second == [{"contestId": 3, "index": "A"}]
+        assert generated[2] == [{pack_problem_id(1, "A")}]
+        assert pool.stats()["1x800-800"]["hits"] == 1
+        assert pool.stats()["1x800-800"]["misses"] == 1
+
+
+class TestColumnarIndex:
+
+    def test_matches_problem_index(self):
+        pytest.importorskip("numpy")
+        from utils.problem_columns import ColumnarProblemIndex
+        problems = [ProblemRecord.from_dict(p) for p in TAGGED] + _problemset(6, [800, 1200, 1600])
+        plain, columnar = ProblemIndex(problems), ColumnarProblemIndex(problems)
+        assert sorted(columnar.tags) == sorted(plain.tags)
+        for text in ("dp", "dp,!greedy", "greedy|trees", "!dp", "no such tag"):
+            tags = parse_tags(text)
+            for low, high in ((0, 4000), (1200, 1300), (1400, 1800)):
+                assert columnar.count(low, high, tags) == plain.count(low, high, tags)
+                assert list(columnar.iter_range(low, high, tags)) == list(plain.iter_range(low, high, tags))
+        dp = parse_tags("dp")
+        assert columnar.random(1800, 2000, random.Random(0), tags=dp)["name"] == "Brute"
+        assert columnar.random(1400, 1800, tags=dp) is None
+        assert len(columnar.sample(0, 4000, 5, random.Random(0), tags=dp)) == 3
+        picked = ProblemSelector(columnar).select(2, 1200, 1300, random.Random(0), tags=dp)
+        assert [p["name"] for p in picked] == ["Greedy DP", "Pure DP"]
+
+    def test_cutoff_and_nearest_match_problem_index(self):
+        pytest.importorskip("numpy")
+        from utils.problem_columns import ColumnarProblemIndex
+        problems = [
+            dict(p, tags=["dp"] if i % 3 else ["greedy"])
+            for i, p in enumerate(_problemset(30, [800, 900, 1000, 1300, 1700, 2100]))
+        ]
+        dp = parse_tags("dp")
+        start_times = {c: c * 100 for c in range(1, 31) if c % 7}
+        plain = ProblemIndex(problems).since(start_times, 1_000)
+        columnar = ColumnarProblemIndex(problems).since(start_times, 1_000)
+        assert list(columnar) == list(plain)
+        assert len(columnar) == 6 * 18
+        assert [columnar.packed_id(i) for i in range(len(columnar))] == [plain.packed_id(i) for i in range(len(plain))]
+
+        for target in (1050, 1150, 2500):
+            # The walk also yields ratings with no matching problem; scoring skips them
+            steps = [
+                [step for step in ([i for group in groups for i in group]
+                                   for groups in index.nearest_groups(target, 800, 2100, index.matching(dp))) if step]
+                for index in (plain, columnar)
+            ]
+            assert steps[0] == steps[1]
+        for seed in range(5):
+            for tags in (None, dp):
+                assert (ProblemSelector(columnar).select(4, 800, 2100, random.Random(seed), tags)
+                        == ProblemSelector(plain).select(4, 800, 2100, random.Random(seed), tags))
+        assert len(ColumnarProblemIndex(problems).since({}, 0)) == 0
+
+    def test_falls_back_without_numpy(self):
+        from utils import problem_columns
+        with patch.object(problem_columns, "np", None):
+            index = problem_columns.build_problem_index(TAGGED)
+        assert type(index) is ProblemIndex
+        assert index.count(1200, 1300, parse_tags("dp")) == 2
+
+    def test_falls_back_past_64_tags(self):
+        pytest.importorskip("numpy")
+        from utils.problem_columns import ColumnarProblemIndex, build_problem_index
+        tags = [f"wide tag {i}" for i in range(65)]
+        problems = [{"contestId": 1, "index": "A", "name": "Wide", "rating": 800, "tags": tags}]
+        index = build_problem_index(problems)
+        assert type(index) is ProblemIndex
+        assert type(build_problem_index(TAGGED)) is ColumnarProblemIndex
+
+
+NAMED = [
+    {"contestId": 1, "index": "A", "name": "Tree Queries", "rating": 1900},
+    {"contestId": 2, "index": "B", "name": "Queries on a Tree", "rating": 2100},
+    {"contestId": 3, "index": "C", "name": "Beautiful Array", "rating": 1200},
+    {"contestId": 4, "index": "D", "name": "Array Beautification", "rating": 1500},
+    {"contestId": 5, "index": "E", "name": "Palindromes", "rating": 800},
+    {"contestId": 6, "index": "F", "name": "Sum of Palindromes"},
+    {"contestId": 7, "index": "G", "name": "Watermelon", "rating": 800},
+]
+
+
+class TestNameIndex:
+
+    def _names(self, text, **kwargs):
+        return [p["name"] for p, _ in NameIndex(NAMED).search(text, **kwargs)]
+
+    def test_normalize(self):
+        assert normalize("  Queries-on_a  TREE! ") == "queries on a tree"
+
+    def test_exact_then_prefix_then_substring(self):
+        assert self._names("tree queries")[:2] == ["Tree Queries", "Queries on a Tree"]
+        assert self._names("beautiful array")[:2] == ["Beautiful Array", "Array Beautification"]
+        assert self._names("palindrome") == ["Palindromes", "Sum of Palindromes"]
+
+    def test_typos_and_misses(self):
+        assert self._names("watermelom")[0] == "Watermelon"
+        assert self._names("beatiful aray")[0] == "Beautiful Array"
+        assert self._names("graph coloring") == []
+        assert self._names(" !? ") == []
+
+    def test_scores_and_limit(self):
+        results = NameIndex(NAMED).search("tree queries", limit=1)
+        assert len(results) == 1 and results[0][1] == 1.0
+
+    def test_exact_name_beyond_candidate_cap(self):
+        problems = [{"contestId": i, "index": "A", "name": f"Tree Queries {i}", "rating": 800} for i in range(1000)]
+        problems.append({"contestId": 9999, "index": "A", "name": "Tree", "rating": 3500})
+        assert [p["name"] for p, _ in NameIndex(problems).search("tree", limit=1)] == ["Tree"]
+
+    def test_rating_filter(self):
+        assert self._names("palindrome", low=800, high=800) == ["Palindromes"]
+        assert self._names("array", low=1300) == ["Array Beautification"]
+        assert self._names("tree", high=2000) == ["Tree Queries"]
+
+    def test_refresh_builds_index(self):
+        from utils.problem_record import ProblemRecord
+        records = [ProblemRecord.from_dict(p) for p in NAMED]
+        try:
+            with patch.object(CodeforcesAPI, "_fetch", AsyncMock(return_value=NAMED)), \
+                 patch("utils.codeforces_api.save_problems", return_value=records):
+                assert run(CodeforcesAPI._refresh_problems()) is records
+            index = CodeforcesAPI._name_index[1]
+            with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=records)):
+                assert run(CodeforcesAPI.get_name_index()) is index
+            with patch.object(CodeforcesAPI, "get_problems", AsyncMock(return_value=list(records))):
+                assert run(CodeforcesAPI.get_name_index()) is not index
+        finally:
+            CodeforcesAPI._name_index = None
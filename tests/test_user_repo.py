@@ -0,0 +1,237 @@
+"""Tests for UserRepo, its Database connection and the schema migrations"""
+import asyncio
+import sqlite3
+import time
+import pytest
+from unittest.mock import patch
+from repositories.user_repo import UserRepo
+from scripts.init_db import init_db
+from utils.database import Database, connect, migrate, run_read, run_write
+from utils.handle_cache import HandleCache, MISSING
+from utils.migrations import MIGRATIONS
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "data" / "bot_data.db"))
+    with patch.object(UserRepo, "db", db), patch.object(UserRepo, "handles", HandleCache()):
+        yield db
+    db.close()
+
+
+class TestUserRepo:
+
+    def test_link_and_lookup(self, db):
+        async def scenario():
+            assert await UserRepo.get_cf_handle(1) is None
+            await UserRepo.link_user(1, "tourist")
+            await UserRepo.link_user(1, "Petr")
+            assert await UserRepo.get_cf_handle(1) == "Petr"
+            assert await UserRepo.get_cf_handle("1") == "Petr"
+
+        run(scenario())
+
+    def test_pending_auth(self, db):
+        async def scenario():
+            await UserRepo.add_pending_auth(2, "peter", "1A")
+            pending = await UserRepo.get_pending_auth(2)
+            assert (pending["cf_handle"], pending["problem_id"]) == ("peter", "1A")
+            await UserRepo.remove_pending_auth(2)
+            assert await UserRepo.get_pending_auth(2) is None
+
+        run(scenario())
+
+
+class TestDatabase:
+
+    def test_connection_per_thread_and_schema_applied_once(self, tmp_path):
+        db = Database(str(tmp_path / "x.db"), [(1, "count opens", (
+            "CREATE TABLE IF NOT EXISTS opened (n INTEGER)",
+            "INSERT INTO opened VALUES (1)",
+        ))])
+        conn = db.open()
+        counts = run(asyncio.gather(*(db.fetchone("SELECT COUNT(*) FROM opened") for _ in range(8))))
+        assert counts == [(1,)] * 8
+        assert db.open() is conn
+        assert run(run_read(db.open)) is not conn
+        db.close()
+
+    def test_writes_persist_across_reopen(self, tmp_path):
+        path = str(tmp_path / "x.db")
+        db = Database(path, [(1, "kv", ("CREATE TABLE kv (k TEXT PRIMARY KEY, v TEXT)",))])
+        run(db.write("INSERT INTO kv VALUES (?, ?)", ("a", "1")))
+        db.close()
+        assert run(Database(path, db.migrations).fetchall("SELECT k, v FROM kv")) == [("a", "1")]
+
+    def test_stats_per_query(self, db):
+        async def scenario():
+            for i in range(3):
+                await UserRepo.get_cf_handle(i)
+            await UserRepo.link_user(1, "tourist")
+
+        run(scenario())
+        stats = db.stats()
+        lookup = stats["SELECT cf_handle FROM users WHERE discord_id = ?"]
+        assert lookup["calls"] == 3
+        assert lookup["max_ms"] >= lookup["avg_ms"] >= 0
+        assert stats["INSERT OR REPLACE INTO users (discord_id, cf_handle) VALUES (?, ?)"]["calls"] == 1
+
+    def test_failed_write_rolls_back(self, db):
+        run(UserRepo.link_user(1, "tourist"))
+        with pytest.raises(sqlite3.IntegrityError):
+            run(db.write("INSERT INTO users (discord_id, cf_handle) VALUES (?, ?)", ("1", "dup")))
+        assert run(UserRepo.get_cf_handle(1)) == "tourist"
+        assert db.stats()["INSERT INTO users (discord_id, cf_handle) VALUES (?, ?)"]["calls"] == 1
+
+    def test_event_loop_runs_during_slow_write(self, db):
+        ticks = []
+
+        def slow_write():
+            conn = db.open()
+            with conn:
+                conn.execute("INSERT INTO users VALUES ('1', 'tourist')")
+                time.sleep(0.1)
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            task = asyncio.ensure_future(ticker())
+            await run_write(slow_write)
+            handle = await UserRepo.get_cf_handle(1)
+            task.cancel()
+            return handle
+
+        assert run(scenario()) == "tourist"
+        assert len(ticks) >= 5
+
+
+class TestHandleCache:
+
+    def test_lru_and_negative_ttl(self):
+        now = [0.0]
+        cache = HandleCache(max_size=2, negative_ttl=60, clock=lambda: now[0])
+        assert cache.get("1") is MISSING
+        cache.put("1", "tourist")
+        cache.put("2", None)
+        assert cache.get("2") is None
+        assert cache.get("1") == "tourist"
+        cache.put("3", "Petr")  # evicts "2", the least recently used
+        assert cache.get("2") is MISSING
+        cache.put("4", None)
+        now[0] = 61
+        assert cache.get("4") is MISSING
+        assert cache.get("3") == "Petr"
+        assert cache.stats() == {"entries": 1, "hits": 2, "negative_hits": 1, "misses": 3, "hit_rate": 0.5}
+
+    def test_fill_loses_to_later_put(self):
+        cache = HandleCache()
+        token = cache.token()
+        cache.put("1", "tourist")
+        cache.fill("1", None, token)
+        assert cache.get("1") == "tourist"
+
+    def test_repo_reads_disk_once_and_writes_through(self, db):
+        async def scenario():
+            assert await UserRepo.get_cf_handle(1) is None
+            assert await UserRepo.get_cf_handle(1) is None
+            await UserRepo.link_user(1, "tourist")
+            for _ in range(5):
+                assert await UserRepo.get_cf_handle(1) == "tourist"
+
+        run(scenario())
+        assert db.stats()["SELECT cf_handle FROM users WHERE discord_id = ?"]["calls"] == 1
+        assert UserRepo.handles.stats()["hits"] == 5
+        assert UserRepo.handles.stats()["negative_hits"] == 1
+
+    def test_bulk_lookup_is_one_query(self, db):
+        async def scenario():
+            for discord_id, handle in (("1", "tourist"), ("2", "Petr"), ("3", "Um_nik")):
+                await db.write("INSERT INTO users VALUES (?, ?)", (discord_id, handle))
+            assert await UserRepo.get_cf_handle(1) == "tourist"
+            handles = await UserRepo.get_cf_handles([1, 2, 3, 4])
+            assert handles == {1: "tourist", 2: "Petr", 3: "Um_nik", 4: None}
+            assert await UserRepo.get_cf_handles([4, 2]) == {4: None, 2: "Petr"}
+            assert await UserRepo.get_cf_handle(3) == "Um_nik"
+
+        run(scenario())
+        stats = db.stats()
+        assert stats["SELECT discord_id, cf_handle FROM users WHERE discord_id IN (?, ?, ?)"]["calls"] == 1
+        assert stats["SELECT cf_handle FROM users WHERE discord_id = ?"]["calls"] == 1
+
+    def test_link_during_lookup_is_not_overwritten(self, db):
+        async def scenario():
+            lookup = asyncio.ensure_future(UserRepo.get_cf_handle(1))
+            await asyncio.sleep(0)  # lookup has taken its token and is querying
+            await UserRepo.link_user(1, "tourist")
+            await lookup
+            return await UserRepo.get_cf_handle(1)
+
+        assert run(scenario()) == "tourist"
+
+
+class TestMigrations:
+
+    def _version(self, path):
+        return sqlite3.connect(path).execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+
+    def test_fresh_database(self, tmp_path):
+        path = str(tmp_path / "bot_data.db")
+        init_db(path)
+        assert self._version(path) == MIGRATIONS[-1][0]
+        tables = {row[0] for row in sqlite3.connect(path).execute("SELECT name FROM sqlite_master")}
+        assert {"users", "pending_auths", "cache", "problems", "contests"} <= tables
+        assert not any(name.startswith("idx_") for name in tables)
+
+    def test_runs_each_step_once(self, tmp_path):
+        path = str(tmp_path / "bot_data.db")
+        steps = [(1, "t", ("CREATE TABLE t (n INTEGER)",)), (2, "row", ("INSERT INTO t VALUES (2)",))]
+        assert migrate(connect(path), steps[:1]) == 1
+        assert migrate(connect(path), steps) == 2
+        assert migrate(connect(path), steps) == 2
+        assert sqlite3.connect(path).execute("SELECT n FROM t").fetchall() == [(2,)]
+
+    def test_upgrades_unversioned_database(self, tmp_path):
+        path = str(tmp_path / "bot_data.db")
+        old = sqlite3.connect(path)
+        old.execute("CREATE TABLE users (discord_id TEXT PRIMARY KEY, cf_handle TEXT NOT NULL)")
+        old.execute("INSERT INTO users VALUES ('1', 'tourist')")
+        old.commit()
+        old.close()
+
+        db = Database(path)
+        assert run(db.fetchone("SELECT cf_handle FROM users WHERE discord_id = ?", ("1",))) == ("tourist",)
+        assert self._version(path) == MIGRATIONS[-1][0]
+        db.close()
+
+    def test_failed_step_rolls_back(self, tmp_path):
+        path = str(tmp_path / "bot_data.db")
+        steps = [(1, "broken", ("CREATE TABLE t (n INTEGER)", "NOT SQL"))]
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(connect(path), steps)
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 't'").fetchone() is None
+        assert conn.execute("SELECT MAX(version) FROM schema_version").fetchone() == (None,)
+
+    def test_pragmas(self, tmp_path):
+        conn = Database(str(tmp_path / "bot_data.db")).open()
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone() == (2,)  # MEMORY
+
+    def test_readers_not_blocked_by_writer(self, tmp_path):
+        path = str(tmp_path / "bot_data.db")
+        writer = Database(path).open()
+        writer.execute("INSERT INTO users VALUES ('1', 'tourist')")
+        writer.commit()
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM users")
+        reader = connect(path, timeout=0)
+        assert reader.execute("SELECT cf_handle FROM users").fetchall() == [("tourist",)]
+        writer.rollback()
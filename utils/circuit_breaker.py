@@ -0,0 +1,83 @@
+import time
+from collections import deque
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fails fast while the upstream is erroring.
+
+    Tracks the outcome of the last `window` calls. Once at least `min_calls`
+    are recorded and the failure rate reaches `failure_threshold`, the
+    breaker opens and `allow()` refuses calls for `reset_timeout` seconds.
+    After that a single probe is let through (half-open): success closes
+    the breaker again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=0.5, window=20, min_calls=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self._outcomes = deque(maxlen=window)  # True = success
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Return True if a call may be attempted now"""
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == STATE_HALF_OPEN:
+            # A probe that never reported back (e.g. cancelled) expires too
+            if self._probe_in_flight and time.monotonic() - self._probe_started < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+
+        return True
+
+    def record_success(self):
+        if self.state == STATE_HALF_OPEN:
+            self.state = STATE_CLOSED
+            self._outcomes.clear()
+        self._probe_in_flight = False
+        self._outcomes.append(True)
+
+    def record_failure(self):
+        if self.state == STATE_HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.min_calls and self.failure_rate() >= self.failure_threshold:
+            self._open()
+
+    def failure_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _open(self):
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        self.trips += 1
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 3),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -1,92 +1,553 @@
+import asyncio
+import random
 import aiohttp
-from config.settings import CODEFORCES_API_BASE, CODEFORCES_PROBLEMSET_URL
+from dataclasses import dataclass
+from datetime import datetime
+from config.settings import (
+    CACHE_TTL_SECONDS,
+    CACHE_HARD_EXPIRY_SECONDS,
+    CODEFORCES_API_BASE,
+    CODEFORCES_PROBLEMSET_URL,
+    CODEFORCES_POOL_SIZE,
+    CODEFORCES_KEEPALIVE_SECONDS,
+    CODEFORCES_CALLS_PER_SECOND,
+    CODEFORCES_BURST,
+    CODEFORCES_TIMEOUT_SECONDS,
+    CODEFORCES_ENDPOINT_TIMEOUTS,
+    CODEFORCES_HISTORY_TIMEOUT_SECONDS,
+    CODEFORCES_MAX_RETRIES,
+    CODEFORCES_RETRY_BACKOFF,
+    CODEFORCES_BREAKER_THRESHOLD,
+    CODEFORCES_BREAKER_WINDOW,
+    CODEFORCES_BREAKER_RESET_SECONDS,
+    USER_INFO_BATCH_WINDOW,
+    USER_INFO_BATCH_SIZE,
+    SUBMISSION_SYNC_INITIAL,
+    SUBMISSION_SYNC_PAGE,
+    SUBMISSION_TRACKED_HANDLES,
+    SOLVED_SYNC_FRESH_SECONDS,
+    SOLVED_SETS_TIMEOUT_SECONDS,
+    PROBLEM_CUTOFF_DATE,
+    PROBLEM_SET_POOL_SHAPES,
+    PROBLEM_SET_POOL_DEPTH,
+    PROBLEM_SET_POOL_MAX_SHAPES
+)
 from utils.contest_cache import (
-    is_contest_cache_valid,
+    get_contest_cache_age,
     load_cached_contests,
     save_contests
 )
 from utils.problem_cache import (
-    is_problems_cache_valid,
+    get_problems_cache_age,
     load_cached_problems,
     save_problems
 )
+from utils.request_scheduler import (
+    RequestScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    PRIORITY_BACKGROUND
+)
+from utils.user_info_batcher import UserInfoBatcher
+from utils.circuit_breaker import CircuitBreaker
+from utils.problem_stream import read_problems
+from utils.problem_index import EligiblePool
+from utils.problem_columns import build_problem_index
+from utils.name_index import NameIndex
+from utils.problem_set_pool import ProblemSetPool
+from utils.snapshot_memo import snapshot_memo
+from utils.database import run_read, run_write
+from utils.submission_tracker import SubmissionTracker
+from utils.submission_stream import read_solved
+
+
+@dataclass
+class PoolStats:
+    """Connection counters for the shared Codeforces session"""
+    handshakes: int = 0   # new TCP+TLS connections opened
+    reused: int = 0       # requests served on a kept-alive connection
+
+    @property
+    def reuse_ratio(self):
+        total = self.handshakes + self.reused
+        return self.reused / total if total else 0.0
+
 
 class CodeforcesAPI:
     """Handles all interactions with the Codeforces API using static methods"""
-    
+
+    _session = None
+    _session_loop = None
+    _pool_stats = PoolStats()
+    scheduler = RequestScheduler(CODEFORCES_CALLS_PER_SECOND, CODEFORCES_BURST)
+    breaker = CircuitBreaker(
+        failure_threshold=CODEFORCES_BREAKER_THRESHOLD,
+        window=CODEFORCES_BREAKER_WINDOW,
+        reset_timeout=CODEFORCES_BREAKER_RESET_SECONDS
+    )
+    _inflight = {}  # key -> Task shared by concurrent identical calls
+    _background_tasks = set()
+    _problem_index = None  # (problems, ProblemIndex) for the cached problem list
+    _eligible_pool = None  # (problems, contests, EligiblePool)
+    _name_index = None  # (problems, NameIndex) for ;find
+    user_info_batcher = UserInfoBatcher(
+        lambda handles: CodeforcesAPI.get_user_infos(handles),
+        window=USER_INFO_BATCH_WINDOW,
+        max_batch=USER_INFO_BATCH_SIZE
+    )
+    submission_tracker = SubmissionTracker(
+        lambda handle, start, count: CodeforcesAPI.fetch_submission_page(handle, start, count),
+        lambda handle: CodeforcesAPI.fetch_solved_history(handle),
+        initial_count=SUBMISSION_SYNC_INITIAL,
+        page_size=SUBMISSION_SYNC_PAGE,
+        max_handles=SUBMISSION_TRACKED_HANDLES
+    )
+    problem_sets = ProblemSetPool(
+        lambda n, low, high, tags, exclude: CodeforcesAPI._select_problem_set(n, low, high, tags, exclude),
+        shapes=PROBLEM_SET_POOL_SHAPES,
+        depth=PROBLEM_SET_POOL_DEPTH,
+        max_shapes=PROBLEM_SET_POOL_MAX_SHAPES
+    )
+
+    # -------------------- Session --------------------
+
     @staticmethod
-    async def fetch(session, url):
-        """Fetch data from URL"""
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.json()
-            return None
-    
+    async def start_session():
+        """Open the shared keep-alive session (no-op if one is already open)"""
+        loop = asyncio.get_running_loop()
+        session = CodeforcesAPI._session
+        if session is not None and not session.closed and CodeforcesAPI._session_loop is loop:
+            return session
+
+        connector = aiohttp.TCPConnector(
+            limit=CODEFORCES_POOL_SIZE,
+            keepalive_timeout=CODEFORCES_KEEPALIVE_SECONDS
+        )
+        CodeforcesAPI._session = aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[CodeforcesAPI._trace_config()]
+        )
+        CodeforcesAPI._session_loop = loop
+        return CodeforcesAPI._session
+
     @staticmethod
-    async def get_user_rating(handle):
-        async with aiohttp.ClientSession() as session:
-            data = await CodeforcesAPI.fetch(session, f"{CODEFORCES_API_BASE}user.info?handles={handle}")
-            if data and data.get('status') == 'OK':
-                return data['result'][0]['rating']
+    async def close_session():
+        """Close the shared session and its pooled connections"""
+        session = CodeforcesAPI._session
+        CodeforcesAPI._session = None
+        CodeforcesAPI._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    @staticmethod
+    def _trace_config():
+        async def on_connection_create(session, ctx, params):
+            CodeforcesAPI._pool_stats.handshakes += 1
+
+        async def on_connection_reuse(session, ctx, params):
+            CodeforcesAPI._pool_stats.reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create)
+        trace_config.on_connection_reuseconn.append(on_connection_reuse)
+        return trace_config
+
+    @staticmethod
+    def pool_stats():
+        """Return open connections, handshake count and reuse ratio of the pool"""
+        stats = CodeforcesAPI._pool_stats
+        open_connections = 0
+        session = CodeforcesAPI._session
+        if session is not None and not session.closed:
+            connector = session.connector
+            # aiohttp has no public counter for this; idle + in-use connections
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            open_connections = idle + len(getattr(connector, "_acquired", ()))
+        return {
+            "open_connections": open_connections,
+            "handshakes": stats.handshakes,
+            "reused": stats.reused,
+            "reuse_ratio": round(stats.reuse_ratio, 3)
+        }
+
+    @staticmethod
+    def stats():
+        """Metrics for the pool, rate limiter, circuit breaker and batcher"""
+        return {
+            "pool": CodeforcesAPI.pool_stats(),
+            "scheduler": CodeforcesAPI.scheduler.stats(),
+            "breaker": CodeforcesAPI.breaker.stats(),
+            "user_info": CodeforcesAPI.user_info_batcher.stats(),
+            "snapshots": snapshot_memo.stats(),
+            "problem_sets": CodeforcesAPI.problem_sets.stats(),
+        }
+
+    # -------------------- Requests --------------------
+
+    @staticmethod
+    async def _single_flight(key, factory):
+        """Run factory() once for all concurrent callers with the same key.
+
+        Later callers await the in-flight task instead of starting their own.
+        The task is shielded so one caller being cancelled does not cancel
+        the work for everyone else.
+        """
+        loop = asyncio.get_running_loop()
+        task = CodeforcesAPI._inflight.get(key)
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(factory())
+            CodeforcesAPI._inflight[key] = task
+
+            def _forget(done):
+                if CodeforcesAPI._inflight.get(key) is done:
+                    del CodeforcesAPI._inflight[key]
+
+            task.add_done_callback(_forget)
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def fetch(url, priority=PRIORITY_NORMAL):
+        """Fetch JSON from URL, sharing one request among identical concurrent calls"""
+        return await CodeforcesAPI._single_flight(
+            url, lambda: CodeforcesAPI._fetch(url, priority)
+        )
+
+    @staticmethod
+    async def _fetch(url, priority, read=None, timeout=None):
+        """Fetch JSON from URL, retrying transient failures with jittered backoff.
+
+        `read(response)` replaces the default `response.json()` for a 200
+        (e.g. to stream a large body). `timeout` overrides the endpoint's
+        timeout in seconds. Returns None without a request while the
+        circuit breaker is open.
+        """
+        session = await CodeforcesAPI.start_session()
+        if timeout is None:
+            endpoint = url.split("?", 1)[0].rsplit("/", 1)[-1]
+            timeout = CODEFORCES_ENDPOINT_TIMEOUTS.get(endpoint, CODEFORCES_TIMEOUT_SECONDS)
+        timeout = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(CODEFORCES_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, CODEFORCES_RETRY_BACKOFF * 2 ** attempt))
+            if not CodeforcesAPI.breaker.allow():
+                return None
+
+            await CodeforcesAPI.scheduler.acquire(priority)
+            data, retryable = await CodeforcesAPI._attempt(session, url, timeout, read)
+            if retryable:
+                CodeforcesAPI.breaker.record_failure()
+                continue
+
+            CodeforcesAPI.breaker.record_success()
+            return data
         return None
 
     @staticmethod
-    async def get_contests():
-        """Fetch contest list (cached, refreshed once per day)"""
+    async def _attempt(session, url, timeout, read=None):
+        """Send one GET. Returns (data, retryable)."""
+        try:
+            async with session.get(url, timeout=timeout) as response:
+                if response.status == 200:
+                    if read is not None:
+                        return await read(response), False
+                    return await response.json(), False
+                if response.status == 400 and read is None:
+                    # Bad arguments come back as {"status": "FAILED", "comment": ...}
+                    try:
+                        return await response.json(content_type=None), False
+                    except ValueError:
+                        return None, False
+                if response.status in (429, 503):
+                    # "Call limit exceeded" — back off before the next call
+                    CodeforcesAPI.scheduler.penalize()
+                return None, response.status == 429 or response.status >= 500
+        except (asyncio.TimeoutError, aiohttp.ClientError, ValueError):
+            return None, True
 
-        if is_contest_cache_valid():
-            return load_cached_contests()
+    @staticmethod
+    async def get_user_infos(handles):
+        """Fetch user.info for many handles in a single call"""
+        return await CodeforcesAPI.fetch(
+            f"{CODEFORCES_API_BASE}user.info?handles={';'.join(handles)}",
+            PRIORITY_INTERACTIVE
+        )
 
-        async with aiohttp.ClientSession() as session:
-            data = await CodeforcesAPI.fetch(
-                session,
-                f"{CODEFORCES_API_BASE}contest.list"
-            )
+    @staticmethod
+    async def get_user_rating(handle):
+        """Get a user's rating; concurrent lookups are batched into one call"""
+        user = await CodeforcesAPI.user_info_batcher.get(handle)
+        return user.get('rating') if user else None
 
-            if data and data.get("status") == "OK":
-                contests = data["result"]
-                save_contests(contests)
-                return contests
+    @staticmethod
+    async def get_user_ratings(handles):
+        """Get ratings for many handles as {handle: rating or None}"""
+        users = await asyncio.gather(
+            *(CodeforcesAPI.user_info_batcher.get(handle) for handle in handles)
+        )
+        return {
+            handle: user.get('rating') if user else None
+            for handle, user in zip(handles, users)
+        }
+
+    @staticmethod
+    async def _stale_while_revalidate(key, cache_age, load_cached, refresh):
+        """Serve the cached snapshot, refreshing it in the background once stale.
+
+        Callers only wait for a download when there is no snapshot or it is
+        older than CACHE_HARD_EXPIRY_SECONDS, and even then get the old
+        snapshot back if the download fails. The cache is read on a
+        database thread, in one hop when the snapshot is usable, and
+        concurrent callers share that read rather than each decoding it.
+        """
+        def read_snapshot():
+            age = cache_age()
+            if age is not None and age < CACHE_HARD_EXPIRY_SECONDS:
+                return age, load_cached()
+            return age, None
+
+        age, cached = await CodeforcesAPI._single_flight(f"read:{key}", lambda: run_read(read_snapshot))
+        if age is not None and age < CACHE_HARD_EXPIRY_SECONDS:
+            if age >= CACHE_TTL_SECONDS:
+                CodeforcesAPI._refresh_in_background(key, refresh)
+            return cached
+
+        fresh = await CodeforcesAPI._single_flight(key, refresh)
+        if fresh:
+            return fresh
+        if age is None:
+            return []
+        return await CodeforcesAPI._single_flight(f"read:{key}", lambda: run_read(load_cached))
+
+    @staticmethod
+    def _refresh_in_background(key, refresh):
+        if key in CodeforcesAPI._inflight:
+            return
+
+        task = asyncio.get_running_loop().create_task(
+            CodeforcesAPI._single_flight(key, refresh)
+        )
+        CodeforcesAPI._background_tasks.add(task)
+
+        def _done(done):
+            CodeforcesAPI._background_tasks.discard(done)
+            if not done.cancelled() and done.exception():
+                print(f"Background refresh of {key} failed: {done.exception()!r}")
+
+        task.add_done_callback(_done)
+
+    @staticmethod
+    async def get_contests():
+        """Fetch contest list (cached, refreshed in the background once per day)"""
+        return await CodeforcesAPI._stale_while_revalidate(
+            "contests", get_contest_cache_age, load_cached_contests, CodeforcesAPI._refresh_contests
+        )
+
+    @staticmethod
+    async def _refresh_contests():
+        data = await CodeforcesAPI.fetch(f"{CODEFORCES_API_BASE}contest.list", PRIORITY_BACKGROUND)
+        if data and data.get("status") == "OK":
+            contests = data["result"]
+            await run_write(save_contests, contests)
+            return contests
 
         return []
-    
+
     @staticmethod
     async def get_problems():
-        """Fetch all problems from Codeforces"""
-        if is_problems_cache_valid():
-            return load_cached_problems()
-        
-        async with aiohttp.ClientSession() as session:
-            data = await CodeforcesAPI.fetch(session, f"{CODEFORCES_API_BASE}problemset.problems")
-            if data and data.get('status') == 'OK':
-                save_problems(data['result']['problems'])
-                return data['result']['problems']
+        """Fetch all problems (cached, refreshed in the background once per day)"""
+        return await CodeforcesAPI._stale_while_revalidate(
+            "problems", get_problems_cache_age, load_cached_problems, CodeforcesAPI._refresh_problems
+        )
+
+    @staticmethod
+    async def _refresh_problems():
+        # Streamed and slimmed entry by entry: the full payload is several MB
+        problems = await CodeforcesAPI._fetch(
+            f"{CODEFORCES_API_BASE}problemset.problems",
+            PRIORITY_BACKGROUND,
+            read=read_problems
+        )
+        if problems:
+            problems = await run_write(save_problems, problems)
+            # Index the names right away so ;find never pays for the build
+            await CodeforcesAPI._index_names(problems)
+            return problems
         return []
-    
+
+    @staticmethod
+    async def get_problem_index():
+        """ProblemIndex over the cached problems, rebuilt only when the cached list changes.
+
+        Columnar (NumPy) when available, see utils.problem_columns.
+        """
+        problems = await CodeforcesAPI.get_problems()
+        return await CodeforcesAPI._index_problems(problems)
+
+    @staticmethod
+    async def _index_problems(problems):
+        """ProblemIndex over a problem list, built once on a worker thread"""
+        cached = CodeforcesAPI._problem_index
+        if cached and cached[0] is problems:
+            return cached[1]
+
+        async def build():
+            index = await asyncio.to_thread(build_problem_index, problems)
+            CodeforcesAPI._problem_index = (problems, index)
+            return index
+
+        return await CodeforcesAPI._single_flight(f"problem_index:{id(problems)}", build)
+
+    @staticmethod
+    async def _index_names(problems):
+        """NameIndex over a problem list, built once on a worker thread"""
+        cached = CodeforcesAPI._name_index
+        if cached and cached[0] is problems:
+            return cached[1]
+
+        async def build():
+            index = await asyncio.to_thread(NameIndex, problems)
+            CodeforcesAPI._name_index = (problems, index)
+            return index
+
+        return await CodeforcesAPI._single_flight(f"name_index:{id(problems)}", build)
+
+    @staticmethod
+    async def get_name_index():
+        """NameIndex over the cached problem names, rebuilt only when the cached list changes"""
+        problems = await CodeforcesAPI.get_problems()
+        return await CodeforcesAPI._index_names(problems)
+
+    @staticmethod
+    async def get_eligible_pool():
+        """Problems duels and rounds may use: rated, from contests since PROBLEM_CUTOFF_DATE.
+
+        Rebuilt only when the cached problems or contests, or the cutoff, change.
+        """
+        problems = await CodeforcesAPI.get_problems()
+        contests = await CodeforcesAPI.get_contests()
+        cutoff_ts = int(datetime.fromisoformat(PROBLEM_CUTOFF_DATE).timestamp())
+
+        cached = CodeforcesAPI._eligible_pool
+        if cached and cached[0] is problems and cached[1] is contests and cached[2].cutoff_ts == cutoff_ts:
+            return cached[2]
+
+        async def build():
+            # The cutoff filters the shared problem index instead of building a second one
+            index = await CodeforcesAPI._index_problems(problems)
+            pool = await asyncio.to_thread(EligiblePool, problems, contests, cutoff_ts, index=index)
+            if CodeforcesAPI._eligible_pool:
+                CodeforcesAPI.problem_sets.clear()  # ready-made sets came from the old pool
+            CodeforcesAPI._eligible_pool = (problems, contests, pool)
+            return pool
+
+        return await CodeforcesAPI._single_flight(
+            f"eligible_pool:{id(problems)}:{id(contests)}:{cutoff_ts}", build
+        )
+
+    @staticmethod
+    async def get_problem_set(n, low, high, tags=None, rng=None, exclude=()):
+        """n problems for a duel or round, or None if [low, high] has too few matching `tags`.
+
+        `exclude` is a list of solved sets (see get_solved_sets) whose
+        problems must not be picked. Served from the ready-made pool unless
+        a seeded `rng` asks for a reproducible selection.
+        """
+        if rng is not None:
+            return await CodeforcesAPI._select_problem_set(n, low, high, tags, exclude, rng)
+        return await CodeforcesAPI.problem_sets.take(n, low, high, tags, exclude)
+
+    @staticmethod
+    async def _select_problem_set(n, low, high, tags=None, exclude=(), rng=None):
+        pool = await CodeforcesAPI.get_eligible_pool()
+        return pool.selector.select(n, low, high, rng, tags, exclude)
+
+    @staticmethod
+    async def fetch_submission_page(handle, start, count):
+        """Get `count` submissions of a user starting at `start` (1-based, newest first).
+
+        Returns None if the request failed.
+        """
+        data = await CodeforcesAPI.fetch(
+            f"{CODEFORCES_API_BASE}user.status?handle={handle}&from={start}&count={count}",
+            PRIORITY_INTERACTIVE
+        )
+        if data and data.get('status') == 'OK':
+            return data['result']
+        return None
+
+    @staticmethod
+    async def fetch_solved_history(handle):
+        """Stream a user's whole history down to (highest submission id, packed solved ids).
+
+        Entries are decoded as they arrive and only the solved ids are
+        kept, so a heavy user's multi-megabyte history neither sits in
+        memory nor blocks the event loop in one parse. Returns None if the
+        request failed.
+        """
+        return await CodeforcesAPI._fetch(
+            f"{CODEFORCES_API_BASE}user.status?handle={handle}&from=1",
+            PRIORITY_INTERACTIVE,
+            read=read_solved,
+            timeout=CODEFORCES_HISTORY_TIMEOUT_SECONDS
+        )
+
     @staticmethod
     async def get_user_submissions(handle, count=10):
         """Get recent submissions of a user"""
-        async with aiohttp.ClientSession() as session:
-            data = await CodeforcesAPI.fetch(
-                session, 
-                f"{CODEFORCES_API_BASE}user.status?handle={handle}&from=1&count={count}"
-            )
-            if data and data.get('status') == 'OK':
-                return data['result']
-        return []
-    
+        return await CodeforcesAPI.fetch_submission_page(handle, 1, count) or []
+
+    @staticmethod
+    async def sync_submissions(handle):
+        """Pull a user's submissions newer than the last ones seen"""
+        return await CodeforcesAPI._single_flight(
+            f"sync:{handle.lower()}",
+            lambda: CodeforcesAPI.submission_tracker.sync(handle)
+        )
+
+    @staticmethod
+    async def get_solved_sets(handles, timeout=SOLVED_SETS_TIMEOUT_SECONDS):
+        """Solved sets (packed problem ids) for each handle, reading full histories once.
+
+        A handle whose history is already loaded is brought up to date with
+        an incremental sync (one small page when nothing is new), so
+        problems solved outside the bot are excluded too; one synced in the
+        last SOLVED_SYNC_FRESH_SECONDS is used as is. A handle whose history
+        could not be read gets what is known so far, and so does every
+        handle if this takes longer than `timeout` seconds. The syncs and
+        history reads keep running in the background for next time.
+        """
+        tracker = CodeforcesAPI.submission_tracker
+
+        async def load(handle):
+            if tracker.has_history(handle):
+                if not tracker.synced_within(handle, SOLVED_SYNC_FRESH_SECONDS):
+                    await CodeforcesAPI.sync_submissions(handle)
+            else:
+                await CodeforcesAPI._single_flight(
+                    f"history:{handle.lower()}", lambda: tracker.load_history(handle)
+                )
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*(load(h) for h in handles)), timeout)
+        except asyncio.TimeoutError:
+            print(f"Solved sets for {', '.join(handles)} took over {timeout}s; using what is known")
+        return [tracker.solved(h) for h in handles]
+
+    @staticmethod
+    async def get_first_ac(handle, contest_id, problem_index):
+        """Earliest accepted submission by a user on a problem, or None"""
+        await CodeforcesAPI.sync_submissions(handle)
+        return CodeforcesAPI.submission_tracker.first_ac(handle, contest_id, problem_index)
+
     @staticmethod
     async def check_compilation_error(handle, contest_id, problem_index):
         """Check if user has a compilation error on specific problem"""
-        submissions = await CodeforcesAPI.get_user_submissions(handle, 50)
-        for sub in submissions:
-            problem = sub.get('problem', {})
-            if (problem.get('contestId') == contest_id and 
-                problem.get('index') == problem_index and
-                sub.get('verdict') == 'COMPILATION_ERROR'):
-                return True
-        return False
-    
+        await CodeforcesAPI.sync_submissions(handle)
+        return CodeforcesAPI.submission_tracker.has_compilation_error(
+            handle, contest_id, problem_index
+        )
+
     @staticmethod
     def get_problem_url(problem):
         """Get the URL for a problem"""
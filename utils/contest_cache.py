@@ -1,37 +1,73 @@
-import sqlite3
 import json
 import time
 from config.settings import DATABASE_PATH, CACHE_TTL_SECONDS
+from utils.database import get_database
+from utils.snapshot_memo import snapshot_memo, MISSING
+
+CACHE_KEY = 'contests_table'
+_LEGACY_CACHE_KEY = 'contests'  # whole contest list as one JSON blob
 
 def get_connection():
-    return sqlite3.connect(DATABASE_PATH)
+    """The bot's shared connection (tables come from utils/migrations.py)"""
+    return get_database(DATABASE_PATH).open()
 
-def is_contest_cache_valid():
+def get_contest_cache_age():
+    """Seconds since the contests table was refreshed, or None if it never was"""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT last_updated FROM cache WHERE key = 'contests'")
+            cursor.execute("SELECT last_updated FROM cache WHERE key = ?", (CACHE_KEY,))
             result = cursor.fetchone()
             if result:
-                return time.time() - result[0] < CACHE_TTL_SECONDS
+                return time.time() - result[0]
     except Exception:
         pass
-    return False
+    return None
+
+def is_contest_cache_valid():
+    age = get_contest_cache_age()
+    return age is not None and age < CACHE_TTL_SECONDS
+
+def _row_to_contest(row):
+    contest_id, name, phase, start_time = row
+    contest = {'id': contest_id, 'name': name, 'phase': phase}
+    if start_time is not None:
+        contest['startTimeSeconds'] = start_time
+    return contest
 
 def load_cached_contests():
+    """Return all cached contests, rebuilding the list only when the table has changed"""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT data FROM cache WHERE key = 'contests'")
+        cursor.execute("SELECT last_updated FROM cache WHERE key = ?", (CACHE_KEY,))
         result = cursor.fetchone()
-        if result:
-            return json.loads(result[0])
-    return []
+        if not result:
+            return []
+
+        contests = snapshot_memo.get(CACHE_KEY, result[0])
+        if contests is MISSING:
+            cursor.execute("SELECT id, name, phase, start_time FROM contests ORDER BY rowid")
+            contests = [_row_to_contest(row) for row in cursor]
+            snapshot_memo.put(CACHE_KEY, result[0], contests)
+        return contests
 
 def save_contests(contests):
     with get_connection() as conn:
         cursor = conn.cursor()
+        last_updated = time.time()
+        cursor.execute("DELETE FROM contests")
+        cursor.executemany(
+            "INSERT OR REPLACE INTO contests (id, name, phase, start_time) VALUES (?, ?, ?, ?)",
+            (
+                (c['id'], c.get('name', ''), c.get('phase'), c.get('startTimeSeconds'))
+                for c in contests
+            )
+        )
         cursor.execute(
             "INSERT OR REPLACE INTO cache (key, data, last_updated) VALUES (?, ?, ?)",
-            ('contests', json.dumps(contests), time.time())
+            (CACHE_KEY, json.dumps({'rows': len(contests)}), last_updated)
         )
+        cursor.execute("DELETE FROM cache WHERE key = ?", (_LEGACY_CACHE_KEY,))
         conn.commit()
+    # Write-through: the next load serves this list without re-reading the table
+    snapshot_memo.put(CACHE_KEY, last_updated, contests)
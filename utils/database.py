@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import DATABASE_CACHE_SIZE_KIB, DATABASE_MMAP_BYTES, DATABASE_READERS
+from utils.migrations import MIGRATIONS
+
+# Applied to every connection; journal_mode=WAL is also stored in the file
+PRAGMAS = (
+    ("journal_mode", "WAL"),  # readers keep reading while save_problems rewrites the tables
+    ("synchronous", "NORMAL"),  # safe with WAL: fsync at checkpoints instead of every commit
+    ("cache_size", -DATABASE_CACHE_SIZE_KIB),  # negative: KiB rather than pages
+    ("mmap_size", DATABASE_MMAP_BYTES),
+    ("temp_store", "MEMORY"),  # sort b-trees and temporary indexes stay off disk
+)
+
+# Every database call made from the event loop runs on one of these threads
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+_readers = ThreadPoolExecutor(max_workers=DATABASE_READERS, thread_name_prefix="db-reader")
+
+
+def _fetchone(cursor):
+    return cursor.fetchone()
+
+
+def _fetchall(cursor):
+    return cursor.fetchall()
+
+
+def connect(path, **kwargs):
+    """sqlite3 connection with PRAGMAS applied"""
+    conn = sqlite3.connect(path, **kwargs)
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Apply the migrations newer than the database's schema_version. Returns the version."""
+    with conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    current = row[0] or 0
+    for version, description, statements in migrations:
+        if version <= current:
+            continue
+        with conn:
+            conn.execute("BEGIN")  # sqlite3 would run DDL outside a transaction
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+        print(f"Database migrated to version {version}: {description}")
+        current = version
+    return current
+
+
+async def run_read(fn, *args):
+    """Run fn(*args) on a reader thread; use for anything that only reads the database"""
+    return await asyncio.get_running_loop().run_in_executor(_readers, fn, *args)
+
+
+async def run_write(fn, *args):
+    """Run fn(*args) on the single writer thread, so writes never contend with each other"""
+    return await asyncio.get_running_loop().run_in_executor(_writer, fn, *args)
+
+
+class Database:
+    """Per-thread SQLite connections, migrated once, used from the event loop via threads.
+
+    Each thread gets its own long-lived connection with PRAGMAS applied;
+    the first one also checks the migrations. The async fetchone/fetchall
+    run on the reader threads and write on the writer thread (see
+    run_read/run_write), so a slow disk or a multi-megabyte save_problems
+    never blocks the event loop, and WAL lets the readers carry on while
+    the writer commits. Repeated queries reuse their compiled statements
+    from each connection's statement cache. Every query is timed by its
+    SQL text; stats() reports calls, average and worst time.
+    """
+
+    def __init__(self, path, migrations=MIGRATIONS, cached_statements=64):
+        self.path = path
+        self.migrations = migrations
+        self.cached_statements = cached_statements
+        self._conns = {}  # thread ident -> connection
+        self._migrated = False
+        self._lock = threading.Lock()
+        self._timings = {}  # sql -> [calls, total seconds, max seconds]
+
+    def open(self):
+        """Return the calling thread's connection, opening it (and migrating) the first time"""
+        conn = self._conns.get(threading.get_ident())
+        if conn is None:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = connect(self.path, cached_statements=self.cached_statements, check_same_thread=False)
+                if not self._migrated:
+                    migrate(conn, self.migrations)
+                    self._migrated = True
+            self._conns[threading.get_ident()] = conn
+        return conn
+
+    def close(self):
+        """Close every thread's connection (call once nothing is querying any more)"""
+        conns, self._conns = list(self._conns.values()), {}
+        for conn in conns:
+            conn.execute("PRAGMA optimize")
+            conn.close()
+
+    def _timed(self, sql, params, read):
+        conn = self.open()
+        start = time.perf_counter()
+        try:
+            if read is None:
+                with conn:
+                    conn.execute(sql, params)
+                return None
+            return read(conn.execute(sql, params))
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                timing = self._timings.get(sql)
+                if timing is None:
+                    timing = self._timings[sql] = [0, 0.0, 0.0]
+                timing[0] += 1
+                timing[1] += elapsed
+                timing[2] = max(timing[2], elapsed)
+
+    async def fetchone(self, sql, params=()):
+        return await run_read(self._timed, sql, params, _fetchone)
+
+    async def fetchall(self, sql, params=()):
+        return await run_read(self._timed, sql, params, _fetchall)
+
+    async def write(self, sql, params=()):
+        """Run one statement in its own transaction"""
+        await run_write(self._timed, sql, params, None)
+
+    def stats(self):
+        """Per-query timings in milliseconds, slowest total first"""
+        stats = {}
+        for sql, (calls, total, worst) in sorted(self._timings.items(), key=lambda item: -item[1][1]):
+            stats[" ".join(sql.split())] = {
+                "calls": calls,
+                "avg_ms": round(total / calls * 1000, 3),
+                "max_ms": round(worst * 1000, 3),
+            }
+        return stats
+
+
+_databases = {}  # path -> Database shared by every module using that file
+
+
+def get_database(path):
+    """The shared Database for a file path"""
+    database = _databases.get(path)
+    if database is None:
+        database = _databases[path] = Database(path)
+    return database
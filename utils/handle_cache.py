@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class HandleCache:
+    """Bounded LRU of discord_id -> cf_handle lookups.
+
+    A handle stays cached until it is evicted or overwritten by a link;
+    "not linked" (None) is cached too, but only for `negative_ttl` seconds
+    so a user who links elsewhere is picked up soon. Writers call put()
+    after the database commit (write-through). A reader that missed takes
+    a token() before querying and fills with it, so a fill racing a link
+    never overwrites the newer handle.
+    """
+
+    def __init__(self, max_size=10000, negative_ttl=60, clock=time.monotonic):
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (handle, expires_at or None)
+        self._writes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached handle (None if known unlinked), or MISSING"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            handle, expires_at = entry
+            if expires_at is None or expires_at > self._clock():
+                self._entries.move_to_end(key)
+                if handle is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return handle
+            del self._entries[key]
+        self.misses += 1
+        return MISSING
+
+    def token(self):
+        return self._writes
+
+    def fill(self, key, handle, token):
+        """Cache a value read from the database, unless a put() happened since token"""
+        if token == self._writes:
+            self._store(key, handle)
+
+    def put(self, key, handle):
+        """Write-through after the database commit"""
+        self._writes += 1
+        self._store(key, handle)
+
+    def _store(self, key, handle):
+        expires_at = self._clock() + self.negative_ttl if handle is None else None
+        self._entries[key] = (handle, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._writes += 1
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,54 @@
+# Schema of data/bot_data.db as ordered steps. Each step runs once, in its
+# own transaction, and records its version in the schema_version table.
+# Never edit a released step: append a new one instead.
+MIGRATIONS = (
+    (1, "users, pending auths and cache metadata", (
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            discord_id TEXT PRIMARY KEY,
+            cf_handle TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS pending_auths (
+            discord_id TEXT PRIMARY KEY,
+            cf_handle TEXT NOT NULL,
+            problem_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS cache (
+            key TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            last_updated REAL NOT NULL
+        )
+        ''',
+    )),
+    (2, "problems and contests tables", (
+        '''
+        CREATE TABLE IF NOT EXISTS problems (
+            contest_id INTEGER,
+            problem_index TEXT NOT NULL,
+            name TEXT NOT NULL,
+            rating INTEGER,
+            tags TEXT NOT NULL DEFAULT '[]',
+            PRIMARY KEY (contest_id, problem_index)
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_problems_rating ON problems (rating)",
+        '''
+        CREATE TABLE IF NOT EXISTS contests (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            phase TEXT,
+            start_time INTEGER
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_contests_start_time ON contests (start_time)",
+    )),
+    (3, "drop the rating and start time indexes (filtering moved to ProblemIndex)", (
+        "DROP INDEX IF EXISTS idx_problems_rating",
+        "DROP INDEX IF EXISTS idx_contests_start_time",
+    )),
+)
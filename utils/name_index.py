@@ -0,0 +1,146 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from math import ceil
+from utils.problem_index import _range_bits, _set_bits
+
+# Share of the query's trigrams a name must contain to be a match
+_MIN_SHARED = 0.5
+# Names ranked in full per query, taken from the highest shared-trigram counts
+# (whole count levels only, so the cut never falls between equally good names)
+_CANDIDATES = 256
+# Trigrams on more than 1/_DENSE of the names keep a ready bitset
+_DENSE = 64
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """Casefolded words separated by single spaces"""
+    return " ".join(_SEPARATORS.sub(" ", text.casefold()).split())
+
+
+def trigrams(text):
+    """Trigrams of each word padded as "  word ", so word starts weigh more"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _bitset(positions):
+    if not positions:
+        return 0
+    bitmap = bytearray((positions[-1] >> 3) + 1)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+class NameIndex:
+    """Trigram index over problem names for ;find.
+
+    Problems are kept in rating order (unrated last) and each trigram maps
+    to the positions of the names containing it, so a rating filter is a
+    contiguous range. A query adds up, per name, how many of its trigrams
+    the name shares using bit-sliced counters over position bitsets; the
+    work is a handful of big-integer operations per trigram, not a loop
+    over the names. The names with the highest counts (every name at each
+    count taken, down to at least _CANDIDATES of them) are then ranked:
+    exact names first, then names starting with the query, then names
+    containing it, then by the share of the query's trigrams found, with
+    shorter names first among equals. Typos still match on the trigrams
+    they leave intact.
+    """
+
+    def __init__(self, problems):
+        self._problems = sorted(problems, key=lambda p: (p.get("rating") is None, p.get("rating") or 0))
+        self._ratings = array("i", (p["rating"] for p in self._problems if p.get("rating") is not None))
+        self._names = [normalize(p["name"]) for p in self._problems]
+        self._gram_counts = array("i")
+        postings = {}
+        for position, name in enumerate(self._names):
+            grams = trigrams(name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                bucket = postings.get(gram)
+                if bucket is None:
+                    bucket = postings[gram] = array("i")
+                bucket.append(position)
+        self._postings = postings
+        dense = len(self._problems) // _DENSE
+        self._dense = {gram: _bitset(bucket) for gram, bucket in postings.items() if len(bucket) > dense}
+
+    def __len__(self):
+        return len(self._problems)
+
+    def _bits(self, gram):
+        bits = self._dense.get(gram)
+        if bits is None:
+            bits = _bitset(self._postings.get(gram, ()))
+        return bits
+
+    def search(self, text, limit=10, low=None, high=None):
+        """Best matches for text as (problem, score) pairs, best first.
+
+        The score is the share (0..1) of the query's trigrams in the name.
+        low/high restrict the rating (unrated problems are left out when
+        either is given).
+        """
+        query = normalize(text)
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        # counters[i] holds bit i of every name's shared-trigram count
+        counters = []
+        for gram in grams:
+            carry = self._bits(gram)
+            for level, bits in enumerate(counters):
+                if not carry:
+                    break
+                counters[level], carry = bits ^ carry, bits & carry
+            if carry:
+                counters.append(carry)
+
+        if low is None and high is None:
+            window = _range_bits(0, len(self._problems))
+        else:
+            window = _range_bits(
+                bisect_left(self._ratings, low) if low is not None else 0,
+                bisect_right(self._ratings, high) if high is not None else len(self._ratings)
+            )
+
+        candidates = []
+        for shared in range(len(grams), ceil(len(grams) * _MIN_SHARED) - 1, -1):
+            if len(candidates) >= _CANDIDATES:
+                break
+            bits = window
+            for level, counter in enumerate(counters):
+                bits &= counter if shared >> level & 1 else ~counter
+            if shared >> len(counters):
+                bits = 0
+            # The whole level: cutting it in position (rating) order could
+            # drop the exact name in favour of lower-rated partial ones
+            candidates.extend((position, shared) for position in _set_bits(bits))
+
+        scored = []
+        for position, shared in candidates:
+            name = self._names[position]
+            if name == query:
+                tier = 3
+            elif name.startswith(query):
+                tier = 2
+            elif query in name:
+                tier = 1
+            else:
+                tier = 0
+            coverage = shared / len(grams)
+            similarity = shared / (len(grams) + self._gram_counts[position] - shared)
+            # A name holding the whole query ranks by how little else it holds
+            scored.append((tier, coverage if tier == 0 else 1, similarity, coverage, -position))
+
+        best = heapq.nlargest(limit, scored)
+        return [(self._problems[-position], round(coverage, 3)) for *_, coverage, position in best]
@@ -1,37 +1,78 @@
-import sqlite3
 import json
 import time
 from config.settings import DATABASE_PATH, CACHE_TTL_SECONDS
+from utils.database import get_database
+from utils.problem_record import ProblemRecord
+from utils.snapshot_memo import snapshot_memo, MISSING
+
+CACHE_KEY = 'problems_table'
+_LEGACY_CACHE_KEY = 'problems'  # whole problemset as one JSON blob
+
+_COLUMNS = "p.contest_id, p.problem_index, p.name, p.rating, p.tags"
 
 def get_connection():
-    return sqlite3.connect(DATABASE_PATH)
+    """The bot's shared connection (tables come from utils/migrations.py)"""
+    return get_database(DATABASE_PATH).open()
 
-def is_problems_cache_valid():
+def get_problems_cache_age():
+    """Seconds since the problems table was refreshed, or None if it never was"""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT last_updated FROM cache WHERE key = 'problems'")
+            cursor.execute("SELECT last_updated FROM cache WHERE key = ?", (CACHE_KEY,))
             result = cursor.fetchone()
             if result:
-                return time.time() - result[0] < CACHE_TTL_SECONDS
+                return time.time() - result[0]
     except Exception:
         pass
-    return False
+    return None
+
+def is_problems_cache_valid():
+    age = get_problems_cache_age()
+    return age is not None and age < CACHE_TTL_SECONDS
+
+def _row_to_problem(row):
+    contest_id, index, name, rating, tags = row
+    return ProblemRecord(contest_id, index, name, rating, json.loads(tags))
 
 def load_cached_problems():
+    """Return all cached problems, rebuilding the list only when the table has changed"""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT data FROM cache WHERE key = 'problems'")
+        cursor.execute("SELECT last_updated FROM cache WHERE key = ?", (CACHE_KEY,))
         result = cursor.fetchone()
-        if result:
-            return json.loads(result[0])
-    return []
+        if not result:
+            return []
+
+        problems = snapshot_memo.get(CACHE_KEY, result[0])
+        if problems is MISSING:
+            cursor.execute(f"SELECT {_COLUMNS} FROM problems p ORDER BY p.rowid")
+            problems = [_row_to_problem(row) for row in cursor]
+            snapshot_memo.put(CACHE_KEY, result[0], problems)
+        return problems
 
 def save_problems(problems):
+    """Replace the cached problemset. Returns it as the ProblemRecords later loads will serve."""
+    records = [p if isinstance(p, ProblemRecord) else ProblemRecord.from_dict(p) for p in problems]
     with get_connection() as conn:
         cursor = conn.cursor()
+        last_updated = time.time()
+        cursor.execute("DELETE FROM problems")
+        cursor.executemany(
+            "INSERT OR REPLACE INTO problems (contest_id, problem_index, name, rating, tags) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (p.contest_id, p.index, p.name, p.rating,
+                 json.dumps(p['tags'], separators=(',', ':')))
+                for p in records
+            )
+        )
         cursor.execute(
             "INSERT OR REPLACE INTO cache (key, data, last_updated) VALUES (?, ?, ?)",
-            ('problems', json.dumps(problems), time.time())
+            (CACHE_KEY, json.dumps({'rows': len(records)}), last_updated)
         )
+        cursor.execute("DELETE FROM cache WHERE key = ?", (_LEGACY_CACHE_KEY,))
         conn.commit()
+    # Write-through: the next load serves this list without re-reading the table
+    snapshot_memo.put(CACHE_KEY, last_updated, records)
+    return records
@@ -0,0 +1,153 @@
+import random
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: build_problem_index falls back to ProblemIndex
+    np = None
+
+from utils.problem_index import ProblemIndex
+from utils.problem_record import known_tag_bit, tag_mask, tag_names
+
+
+def _match(tag_col, tags):
+    hit = np.ones(len(tag_col), dtype=bool)
+    for negated, names in tags.clauses:
+        clause = 0
+        for name in names:
+            bit = known_tag_bit(name)
+            if bit is not None:
+                clause |= 1 << bit
+        has = (tag_col & np.uint64(clause)) != 0
+        hit &= ~has if negated else has
+    return hit
+
+
+class ColumnarProblemIndex(ProblemIndex):
+    """ProblemIndex whose filters and nearest-rating scoring run as NumPy column operations.
+
+    Keeps the rating-sorted order and bisect range lookups of ProblemIndex,
+    but stores rating and contest id columns, and tags as a uint64 bitmask
+    column (one bit per tag) instead of one bitset per tag. A TagQuery
+    becomes a boolean column over the rating slice, so filtered counts,
+    picks and samples are array operations. since() looks the contest
+    start times up as a column and keeps the rows by mask. With a TagQuery,
+    nearest_groups() scores every matching candidate's distance to the
+    target at once instead of walking outward rating by rating. Needs
+    NumPy and at most 64 distinct tags.
+    """
+
+    def __init__(self, problems):
+        super().__init__(problems)
+        self._rating_col = np.array(self._ratings, dtype=np.int32)
+        self._contest_col = np.array(
+            [-1 if p["contestId"] is None else p["contestId"] for p in self._problems], dtype=np.int64
+        )
+
+    def _build_tag_index(self):
+        masks = [
+            p.tag_mask if hasattr(p, "tag_mask") else tag_mask(p.get("tags", ()))
+            for p in self._problems
+        ]
+        if any(mask >> 64 for mask in masks):
+            raise OverflowError("more than 64 tags do not fit the uint64 tag column")
+        self._tag_col = np.array(masks, dtype=np.uint64)
+        self._present = int(np.bitwise_or.reduce(self._tag_col)) if masks else 0
+
+    def _take(self, positions):
+        positions = np.asarray(positions, dtype=np.intp)
+        index = object.__new__(type(self))
+        index._problems = [self._problems[i] for i in positions.tolist()]
+        index._rating_col = self._rating_col[positions]
+        index._contest_col = self._contest_col[positions]
+        index._tag_col = self._tag_col[positions]
+        index._present = int(np.bitwise_or.reduce(index._tag_col)) if len(positions) else 0
+        index._ratings = array("i", index._rating_col.tolist())
+        packed = np.array(self._packed_ids, dtype=np.int64)[positions]
+        index._packed_ids = array("q", packed.tolist())
+        return index
+
+    def since(self, start_times, cutoff_ts):
+        if not start_times:
+            return self._take(np.empty(0, dtype=np.intp))
+        contest_ids = np.fromiter(start_times.keys(), dtype=np.int64, count=len(start_times))
+        starts = np.fromiter(start_times.values(), dtype=np.int64, count=len(start_times))
+        order = np.argsort(contest_ids)
+        contest_ids, starts = contest_ids[order], starts[order]
+
+        # Start time column: each row's contest looked up in the sorted ids
+        slot = np.minimum(np.searchsorted(contest_ids, self._contest_col), len(contest_ids) - 1)
+        known = contest_ids[slot] == self._contest_col
+        return self._take(np.flatnonzero(known & (starts[slot] >= cutoff_ts)))
+
+    def nearest_groups(self, target, low, high, allowed=None):
+        if allowed is None:
+            # Unfiltered, the bisect walk touches one rating at a time; scoring
+            # the whole range costs O(range) per pick instead
+            yield from super().nearest_groups(target, low, high)
+            return
+        lo, hi = self._bounds(low, high)
+        if lo >= hi:
+            return
+        candidates = np.flatnonzero(allowed[lo:hi]) + lo
+        gaps = np.abs(self._rating_col[candidates] - target)
+        while len(candidates):
+            closest = gaps == gaps.min()
+            yield [candidates[closest].tolist()]
+            candidates, gaps = candidates[~closest], gaps[~closest]
+
+    @property
+    def tags(self):
+        return tag_names(self._present)
+
+    def matching(self, tags):
+        """Boolean column: True where the problem satisfies a TagQuery"""
+        return _match(self._tag_col, tags)
+
+    def positions(self, start, end, bits):
+        return (np.flatnonzero(bits[start:end]) + start).tolist()
+
+    def _matches(self, low, high, tags):
+        lo, hi = self._bounds(low, high)
+        if lo >= hi:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(_match(self._tag_col[lo:hi], tags)) + lo
+
+    def count(self, low, high, tags=None):
+        if tags is None:
+            return super().count(low, high)
+        lo, hi = self._bounds(low, high)
+        if lo >= hi:
+            return 0
+        return int(np.count_nonzero(_match(self._tag_col[lo:hi], tags)))
+
+    def iter_range(self, low, high, tags=None):
+        if tags is None:
+            yield from super().iter_range(low, high)
+            return
+        for i in self._matches(low, high, tags).tolist():
+            yield self._problems[i]
+
+    def random(self, low, high, rng=random, tags=None):
+        if tags is None:
+            return super().random(low, high, rng)
+        matches = self._matches(low, high, tags)
+        if not len(matches):
+            return None
+        return self._problems[int(matches[rng.randrange(len(matches))])]
+
+    def sample(self, low, high, k, rng=random, tags=None):
+        if tags is None:
+            return super().sample(low, high, k, rng)
+        matches = self._matches(low, high, tags)
+        return [self._problems[int(matches[i])] for i in rng.sample(range(len(matches)), min(k, len(matches)))]
+
+
+def build_problem_index(problems):
+    """ColumnarProblemIndex when NumPy is installed and the tags fit, else ProblemIndex"""
+    if np is not None:
+        try:
+            return ColumnarProblemIndex(problems)
+        except OverflowError:
+            pass
+    return ProblemIndex(problems)
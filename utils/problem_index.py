@@ -0,0 +1,230 @@
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+from utils.problem_record import pack_problem_id
+from utils.problem_selector import ProblemSelector
+
+
+def _tag_bitsets(problems):
+    """Inverted tag index: tag -> int with bit i set when problems[i] has the tag"""
+    flags = {}
+    size = (len(problems) + 7) // 8
+    for position, problem in enumerate(problems):
+        for tag in problem.get("tags", ()):
+            bitmap = flags.get(tag)
+            if bitmap is None:
+                bitmap = flags[tag] = bytearray(size)
+            bitmap[position >> 3] |= 1 << (position & 7)
+    return {tag: int.from_bytes(bitmap, "little") for tag, bitmap in flags.items()}
+
+
+def _set_bits(bits, offset=0):
+    """Yield the positions of the set bits, lowest first"""
+    for byte_index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        while byte:
+            low = byte & -byte
+            yield offset + (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+def _nth_set_bit(bits, n):
+    """Position of the n-th (0-based) set bit"""
+    lo, hi = 0, bits.bit_length() - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (bits & ((1 << (mid + 1)) - 1)).bit_count() > n:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _range_bits(lo, hi):
+    return ((1 << hi) - 1) ^ ((1 << lo) - 1) if lo < hi else 0
+
+
+class ProblemIndex:
+    """Rated problems sorted by rating, for range lookups by bisect.
+
+    Built once per problem cache version; lookups only locate the slice of
+    ratings in [low, high] and index into it, so they cost O(log n) and do
+    not copy the matching problems. Unrated problems are left out.
+
+    Tag filters (a TagQuery) are answered from an inverted index holding
+    one bitset of positions per tag: AND/OR/NOT are integer operations,
+    and a rating range is one more mask.
+    """
+
+    def __init__(self, problems):
+        self._problems = sorted(
+            (p for p in problems if p.get("rating") is not None),
+            key=lambda p: p["rating"]
+        )
+        self._ratings = array("i", (p["rating"] for p in self._problems))
+        self._packed_ids = array("q", (pack_problem_id(p["contestId"], p["index"]) for p in self._problems))
+        self._build_tag_index()
+
+    def _build_tag_index(self):
+        self._tag_bits = _tag_bitsets(self._problems)
+        self._all = (1 << len(self._problems)) - 1
+
+    def _take(self, positions):
+        """Index over the problems at `positions` (ascending), keeping their order"""
+        index = object.__new__(type(self))
+        index._problems = [self._problems[i] for i in positions]
+        index._ratings = array("i", (self._ratings[i] for i in positions))
+        index._packed_ids = array("q", (self._packed_ids[i] for i in positions))
+        index._build_tag_index()
+        return index
+
+    def since(self, start_times, cutoff_ts):
+        """Index of the problems whose contest started at or after cutoff_ts.
+
+        `start_times` maps contest id -> start time; problems of contests
+        missing from it are left out.
+        """
+        positions = []
+        for position, problem in enumerate(self._problems):
+            start = start_times.get(problem["contestId"])
+            if start is not None and start >= cutoff_ts:
+                positions.append(position)
+        return self._take(positions)
+
+    def __len__(self):
+        return len(self._problems)
+
+    def __iter__(self):
+        return iter(self._problems)
+
+    def __getitem__(self, position):
+        return self._problems[position]
+
+    def packed_id(self, position):
+        """pack_problem_id of the problem at a position, for solved-set lookups"""
+        return self._packed_ids[position]
+
+    def _bounds(self, low, high):
+        return bisect_left(self._ratings, low), bisect_right(self._ratings, high)
+
+    @property
+    def tags(self):
+        """Every tag that appears on an indexed problem"""
+        return self._tag_bits.keys()
+
+    def matching(self, tags):
+        """Bitset of the positions whose problems satisfy a TagQuery"""
+        bits = self._all
+        for negated, names in tags.clauses:
+            clause = 0
+            for name in names:
+                clause |= self._tag_bits.get(name, 0)
+            bits &= ~clause if negated else clause
+        return bits
+
+    def positions(self, start, end, bits):
+        """Positions in [start, end) whose bit is set"""
+        return list(_set_bits((bits >> start) & _range_bits(0, end - start), start))
+
+    def _filtered(self, low, high, tags):
+        lo, hi = self._bounds(low, high)
+        return self.matching(tags) & _range_bits(lo, hi)
+
+    def count(self, low, high, tags=None):
+        if tags is not None:
+            return self._filtered(low, high, tags).bit_count()
+        lo, hi = self._bounds(low, high)
+        return max(0, hi - lo)
+
+    def iter_range(self, low, high, tags=None):
+        """Yield the problems rated in [low, high], lowest rating first"""
+        if tags is not None:
+            positions = _set_bits(self._filtered(low, high, tags))
+        else:
+            positions = range(*self._bounds(low, high))
+        for i in positions:
+            yield self._problems[i]
+
+    def random(self, low, high, rng=random, tags=None):
+        """One random problem rated in [low, high], or None"""
+        if tags is not None:
+            bits = self._filtered(low, high, tags)
+            if not bits:
+                return None
+            return self._problems[_nth_set_bit(bits, rng.randrange(bits.bit_count()))]
+
+        lo, hi = self._bounds(low, high)
+        if lo >= hi:
+            return None
+        return self._problems[rng.randrange(lo, hi)]
+
+    def nearest_slices(self, target, low, high):
+        """Yield the positions rated in [low, high], closest rating to target first.
+
+        Each step is a tuple of (start, end) position ranges holding one
+        rating, or two when a rating above and one below are equally close.
+        """
+        lo, hi = self._bounds(low, high)
+        ratings = self._ratings
+        below = above = bisect_left(ratings, target, lo, hi)
+        while below > lo or above < hi:
+            below_gap = target - ratings[below - 1] if below > lo else None
+            above_gap = ratings[above] - target if above < hi else None
+            step = []
+            if below_gap is not None and (above_gap is None or below_gap <= above_gap):
+                start = bisect_left(ratings, ratings[below - 1], lo, below)
+                step.append((start, below))
+                below = start
+            if above_gap is not None and (below_gap is None or above_gap <= below_gap):
+                end = bisect_right(ratings, ratings[above], above, hi)
+                step.append((above, end))
+                above = end
+            yield tuple(step)
+
+    def nearest_groups(self, target, low, high, allowed=None):
+        """Like nearest_slices, but each step is a list of position sequences.
+
+        `allowed` (from matching()) keeps only the positions it has set.
+        """
+        for ranges in self.nearest_slices(target, low, high):
+            if allowed is None:
+                yield [range(start, end) for start, end in ranges]
+            else:
+                yield [self.positions(start, end, allowed) for start, end in ranges]
+
+    def sample(self, low, high, k, rng=random, tags=None):
+        """Up to k distinct random problems rated in [low, high]"""
+        if tags is not None:
+            bits = self._filtered(low, high, tags)
+            total = bits.bit_count()
+            return [self._problems[_nth_set_bit(bits, n)] for n in rng.sample(range(total), min(k, total))]
+
+        lo, hi = self._bounds(low, high)
+        if lo >= hi:
+            return []
+        return [self._problems[i] for i in rng.sample(range(lo, hi), min(k, hi - lo))]
+
+
+class EligiblePool:
+    """Rated problems from contests that started at or after a cutoff.
+
+    Joins the problem and contest lists once, so duel and round generation
+    start from the filtered set. `index` answers rating ranges and
+    `selector` picks problem sets from it. `build_index` turns the
+    problems into an index (ProblemIndex or a drop-in such as
+    utils.problem_columns.build_problem_index) whose since() applies the
+    cutoff; pass an already built `index` over the same problems to skip
+    that step.
+    """
+
+    def __init__(self, problems, contests, cutoff_ts, build_index=ProblemIndex, index=None):
+        self.cutoff_ts = cutoff_ts
+        start_times = {
+            c["id"]: c["startTimeSeconds"] for c in contests if c.get("startTimeSeconds") is not None
+        }
+        if index is None:
+            index = build_index(problems)
+        self.index = index.since(start_times, cutoff_ts)
+        self.selector = ProblemSelector(self.index)
+
+    def __len__(self):
+        return len(self.index)
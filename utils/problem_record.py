@@ -0,0 +1,105 @@
+import sys
+import threading
+from collections.abc import Mapping
+
+# Tag names are shared by every problem, so each gets a bit in a per-process mask
+_TAG_BITS = {}   # tag name -> bit position
+_TAG_NAMES = []  # bit position -> tag name
+_TAG_LOCK = threading.Lock()  # problems are decoded on several database threads
+
+
+def tag_bit(tag):
+    """Bit position of a tag, registering it on first sight"""
+    bit = _TAG_BITS.get(tag)
+    if bit is None:
+        with _TAG_LOCK:
+            bit = _TAG_BITS.get(tag)
+            if bit is None:
+                # Name first: a reader that finds the bit can always resolve it
+                _TAG_NAMES.append(sys.intern(tag))
+                bit = _TAG_BITS[tag] = len(_TAG_NAMES) - 1
+    return bit
+
+
+def known_tag_bit(tag):
+    """Bit position of a tag, or None if no problem has carried it"""
+    return _TAG_BITS.get(tag)
+
+
+def tag_mask(tags):
+    mask = 0
+    for tag in tags:
+        mask |= 1 << tag_bit(tag)
+    return mask
+
+
+def tag_names(mask):
+    names = []
+    bit = 0
+    while mask:
+        if mask & 1:
+            names.append(_TAG_NAMES[bit])
+        mask >>= 1
+        bit += 1
+    return names
+
+
+def pack_problem_id(contest_id, index):
+    """contestId and index letters folded into one int, for compact solved sets"""
+    return ((contest_id or 0) << 24) | int.from_bytes(index.encode()[:3], "big")
+
+
+class ProblemRecord(Mapping):
+    """Compact, read-only problem that still reads like the API dict.
+
+    Holds the slimmed fields in slots, with the index letter interned and
+    the tags folded into a bitmask. problem["rating"], .get("rating") and
+    "rating" in problem behave as they do on the dict (the key is absent
+    for unrated problems), so embeds and get_problem_url take either.
+    Tags come back in the order they were first seen by this process.
+    """
+
+    __slots__ = ("contest_id", "index", "name", "rating", "tag_mask")
+
+    _KEYS = ("contestId", "index", "name", "rating", "tags")
+
+    def __init__(self, contest_id, index, name, rating=None, tags=0):
+        self.contest_id = contest_id
+        self.index = sys.intern(index)
+        self.name = name
+        self.rating = rating
+        self.tag_mask = tags if isinstance(tags, int) else tag_mask(tags)
+
+    @classmethod
+    def from_dict(cls, problem):
+        return cls(
+            problem.get("contestId"), problem["index"], problem["name"],
+            problem.get("rating"), problem.get("tags", ())
+        )
+
+    def __getitem__(self, key):
+        if key == "contestId":
+            return self.contest_id
+        if key == "index":
+            return self.index
+        if key == "name":
+            return self.name
+        if key == "rating" and self.rating is not None:
+            return self.rating
+        if key == "tags":
+            return tag_names(self.tag_mask)
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._KEYS:
+            if key != "rating" or self.rating is not None:
+                yield key
+
+    def __len__(self):
+        return 4 if self.rating is None else 5
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"ProblemRecord({self.contest_id}{self.index} {self.name!r}, rating={self.rating})"
@@ -0,0 +1,92 @@
+import random
+
+# Random draws per rating step before falling back to scanning it
+_DRAWS_PER_STEP = 8
+
+
+class ProblemSelector:
+    """Picks duel/round problem sets from a ProblemIndex.
+
+    For n evenly spaced target ratings in [low, high], each pick is the
+    problem closest to its target whose contest has not been used yet,
+    chosen at random among equally close ones. If the range runs out of
+    fresh contests, the remaining slots take the closest problems from any
+    contest. Each pick walks outward from the target one rating at a time,
+    so the cost grows with n and the number of distinct ratings, not with
+    the size of the problemset. A TagQuery narrows each rating to the
+    problems set in the index's tag bitset, and problems in any of the
+    `exclude` solved sets (packed ids) are skipped.
+
+    Pass a seeded random.Random as `rng` for reproducible selections.
+    """
+
+    def __init__(self, index, rng=None):
+        self.index = index
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def targets(n, low, high):
+        """Evenly spaced target ratings from low to high"""
+        if n > 1:
+            return [low + (high - low) * i / (n - 1) for i in range(n)]
+        return [(low + high) // 2]
+
+    def select(self, n, low, high, rng=None, tags=None, exclude=()):
+        """Return n problems, or None if [low, high] holds fewer than n (matching tags, not excluded)"""
+        rng = rng or self.rng
+        allowed = self.index.matching(tags) if tags is not None else None
+        packed_id = self.index.packed_id
+
+        def unsolved(i):
+            packed = packed_id(i)
+            return not any(packed in solved for solved in exclude)
+
+        targets = self.targets(n, low, high)
+        selected = []
+        taken = set()          # index positions already selected
+        used_contests = set()
+
+        for target in targets:
+            position = self._pick(
+                target, low, high, rng, allowed,
+                lambda i: i not in taken and self.index[i]["contestId"] not in used_contests and unsolved(i)
+            )
+            if position is not None:
+                taken.add(position)
+                used_contests.add(self.index[position]["contestId"])
+                selected.append(self.index[position])
+
+        # Not enough distinct contests: fill from any contest
+        if len(selected) < n:
+            target = targets[len(selected)]
+            while len(selected) < n:
+                position = self._pick(
+                    target, low, high, rng, allowed, lambda i: i not in taken and unsolved(i)
+                )
+                if position is None:
+                    return None
+                taken.add(position)
+                selected.append(self.index[position])
+
+        return selected
+
+    def _pick(self, target, low, high, rng, allowed, accept):
+        """Position of a random acceptable problem at the closest rating to target, or None"""
+        for groups in self.index.nearest_groups(target, low, high, allowed):
+            total = sum(len(group) for group in groups)
+
+            for _ in range(min(_DRAWS_PER_STEP, total)):
+                offset = rng.randrange(total)
+                for group in groups:
+                    if offset < len(group):
+                        position = group[offset]
+                        break
+                    offset -= len(group)
+                if accept(position):
+                    return position
+
+            for group in groups:
+                for position in group:
+                    if accept(position):
+                        return position
+        return None
@@ -0,0 +1,119 @@
+import asyncio
+from collections import deque
+from utils.problem_record import pack_problem_id
+
+
+def _solved_any(problems, exclude):
+    if not exclude:
+        return False
+    for problem in problems:
+        packed = pack_problem_id(problem["contestId"], problem["index"])
+        if any(packed in solved for solved in exclude):
+            return True
+    return False
+
+
+class ProblemSetPool:
+    """Ready-made duel/round problem sets for the popular (n, low, high, tags) shapes.
+
+    `generate(n, low, high, tags, exclude)` is a coroutine returning a
+    problem list or None; tags is a TagQuery or None (configured shapes may
+    omit it) and exclude a list of solved sets of packed problem ids. Ready
+    sets are generated without exclusions, so take() skips a set that hits
+    one and generates a fresh one instead.
+    Each pooled shape keeps up to `depth` sets; take() pops one and refills
+    the ring in the background, so a hit costs a deque pop. Configured
+    shapes are pooled from the start, and any other shape joins once it has
+    missed `promote_after` times, up to `max_shapes` shapes in total.
+    clear() drops every ready set, e.g. when the problem cache changes.
+    """
+
+    def __init__(self, generate, shapes=(), depth=3, max_shapes=8, promote_after=3):
+        self._generate = generate
+        self.depth = depth
+        self.max_shapes = max_shapes
+        self.promote_after = promote_after
+        self._rings = {self._shape(*shape): deque() for shape in shapes}
+        self._refills = {}  # shape -> refill Task
+        self._generation = 0  # bumped by clear() so in-flight refills drop their sets
+        self.hits = {}
+        self.misses = {}
+
+    @staticmethod
+    def _shape(n, low, high, tags=None):
+        return (n, low, high, tags)
+
+    async def take(self, n, low, high, tags=None, exclude=()):
+        """Return a problem set for the shape, or None if the range has too few problems"""
+        shape = self._shape(n, low, high, tags)
+        ring = self._rings.get(shape)
+        if ring:
+            for position, problems in enumerate(ring):
+                if not _solved_any(problems, exclude):
+                    del ring[position]
+                    self.hits[shape] = self.hits.get(shape, 0) + 1
+                    self._schedule_refill(shape)
+                    return problems
+
+        self.misses[shape] = self.misses.get(shape, 0) + 1
+        if ring is None and self.misses[shape] >= self.promote_after and len(self._rings) < self.max_shapes:
+            self._rings[shape] = deque()
+
+        problems = await self._generate(n, low, high, tags, exclude)
+        if problems is not None and shape in self._rings:
+            self._schedule_refill(shape)
+        return problems
+
+    def warm(self):
+        """Start filling every pooled shape (call from a running event loop)"""
+        for shape in self._rings:
+            self._schedule_refill(shape)
+
+    def clear(self):
+        self._generation += 1
+        for ring in self._rings.values():
+            ring.clear()
+
+    def _schedule_refill(self, shape):
+        loop = asyncio.get_running_loop()
+        task = self._refills.get(shape)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+
+        task = loop.create_task(self._refill(shape))
+        self._refills[shape] = task
+
+        def _done(done):
+            if self._refills.get(shape) is done:
+                del self._refills[shape]
+            if not done.cancelled() and done.exception():
+                print(f"Refilling problem sets for {shape} failed: {done.exception()!r}")
+
+        task.add_done_callback(_done)
+
+    async def _refill(self, shape):
+        ring = self._rings[shape]
+        while len(ring) < self.depth:
+            generation = self._generation
+            problems = await self._generate(*shape, ())
+            if problems is None:
+                return
+            if generation == self._generation:
+                ring.append(problems)
+
+    async def wait_refilled(self):
+        """Wait for in-flight refills (for tests and benchmarks)"""
+        while self._refills:
+            await asyncio.gather(*self._refills.values(), return_exceptions=True)
+
+    def stats(self):
+        stats = {}
+        for shape in sorted(set(self._rings) | set(self.hits) | set(self.misses), key=str):
+            n, low, high, tags = shape
+            name = f"{n}x{low}-{high}" + (f" [{tags}]" if tags is not None else "")
+            stats[name] = {
+                "ready": len(self._rings.get(shape, ())),
+                "hits": self.hits.get(shape, 0),
+                "misses": self.misses.get(shape, 0),
+            }
+        return stats
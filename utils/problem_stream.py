@@ -0,0 +1,98 @@
+import codecs
+import json
+
+# The only problem fields the bot reads
+PROBLEM_FIELDS = ("contestId", "index", "name", "rating", "tags")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def slim_problem(problem):
+    """Drop everything but PROBLEM_FIELDS from a Codeforces problem dict"""
+    return {key: problem[key] for key in PROBLEM_FIELDS if key in problem}
+
+
+class ProblemStreamParser:
+    """Incremental parser for a problemset.problems response body.
+
+    Bytes are fed in as they arrive; each complete entry of
+    result.problems is decoded on its own and slimmed, so the full
+    document (and the problemStatistics that follow) is never held in
+    memory at once.
+    """
+
+    _SEEK, _ARRAY, _DONE = range(3)
+    _KEY = '"problems"'
+    _slim = staticmethod(slim_problem)  # applied to each decoded entry
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = self._SEEK
+
+    @property
+    def done(self):
+        """True once the closing ] of the problems array has been seen"""
+        return self._state == self._DONE
+
+    def feed(self, chunk):
+        """Consume a chunk of bytes. Returns the problems completed by it."""
+        if self._state == self._DONE:
+            return []
+        self._buffer += self._text.decode(chunk)
+
+        if self._state == self._SEEK and not self._seek_array():
+            return []
+
+        problems = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._state = self._DONE
+                pos += 1
+                break
+            try:
+                problem, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # entry continues in the next chunk
+            problems.append(self._slim(problem))
+
+        self._buffer = "" if self._state == self._DONE else buffer[pos:]
+        return problems
+
+    def _seek_array(self):
+        """Skip ahead to just after `"problems": [`. Returns False if not there yet."""
+        at = self._buffer.find(self._KEY)
+        if at < 0:
+            # Keep a tail in case the key is split across chunks
+            self._buffer = self._buffer[-len(self._KEY):]
+            return False
+
+        bracket = self._buffer.find("[", at + len(self._KEY))
+        if bracket < 0:
+            self._buffer = self._buffer[at:]
+            return False
+
+        self._buffer = self._buffer[bracket + 1:]
+        self._state = self._ARRAY
+        return True
+
+
+async def read_problems(response):
+    """Stream result.problems out of a problemset.problems response.
+
+    Returns the slimmed problem list, or None if the body had no complete
+    problems array (e.g. a FAILED status).
+    """
+    parser = ProblemStreamParser()
+    problems = []
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        # Keep draining after the array closes so the connection can be reused
+        problems.extend(parser.feed(chunk))
+    return problems if parser.done else None
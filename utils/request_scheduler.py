@@ -0,0 +1,95 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+# Priority lanes, lower runs first
+PRIORITY_INTERACTIVE = 0   # ;check, ;rcheck, ;verify — a user is waiting
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2    # contest.list / problemset.problems refreshes
+
+LANE_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class RequestScheduler:
+    """Token-bucket rate limiter with priority lanes.
+
+    Callers `await acquire(priority)` before each request. A single dispatcher
+    task hands out tokens at `rate` per second (up to `burst` saved up),
+    always to the highest-priority waiter first, FIFO within a lane.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._waiters = []  # heap of (priority, seq, future, enqueued_at)
+        self._seq = itertools.count()
+        self._dispatcher = None
+
+        self._granted = {lane: 0 for lane in LANE_NAMES}
+        self._total_wait = {lane: 0.0 for lane in LANE_NAMES}
+        self._max_wait = {lane: 0.0 for lane in LANE_NAMES}
+
+    async def acquire(self, priority=PRIORITY_NORMAL):
+        """Wait until this caller may send one request"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future, time.monotonic()))
+
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        # If cancelled the future is cancelled too and the dispatcher skips it
+        await future
+
+    def penalize(self):
+        """Drop saved-up tokens after the server reports the limit was exceeded"""
+        self._refill()
+        self._tokens = min(self._tokens, 0)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def _dispatch(self):
+        while self._waiters:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            priority, _, future, enqueued_at = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+
+            self._tokens -= 1
+            waited = time.monotonic() - enqueued_at
+            self._granted[priority] += 1
+            self._total_wait[priority] += waited
+            self._max_wait[priority] = max(self._max_wait[priority], waited)
+            future.set_result(None)
+
+    def stats(self):
+        """Queue depth and wait-time metrics per priority lane"""
+        depth = {lane: 0 for lane in LANE_NAMES}
+        for priority, _, future, _ in self._waiters:
+            if not future.done():
+                depth[priority] += 1
+
+        lanes = {}
+        for lane, name in LANE_NAMES.items():
+            granted = self._granted[lane]
+            lanes[name] = {
+                "queued": depth[lane],
+                "granted": granted,
+                "avg_wait": round(self._total_wait[lane] / granted, 3) if granted else 0.0,
+                "max_wait": round(self._max_wait[lane], 3),
+            }
+        return {"tokens": round(self._tokens, 2), "lanes": lanes}
@@ -0,0 +1,41 @@
+MISSING = object()
+
+
+class SnapshotMemo:
+    """Keeps decoded cache rows in memory until the row changes.
+
+    Entries are keyed by cache key and remembered with the row's
+    `last_updated`; a lookup with a different timestamp is a miss, so a
+    cheap `SELECT last_updated` decides whether the blob needs decoding
+    again. Values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self):
+        self._entries = {}  # key -> (last_updated, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, last_updated):
+        """Return the memoised value, or MISSING if absent or out of date"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == last_updated:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return MISSING
+
+    def put(self, key, last_updated, value):
+        self._entries[key] = (last_updated, value)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+snapshot_memo = SnapshotMemo()
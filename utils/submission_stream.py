@@ -0,0 +1,38 @@
+from utils.problem_record import pack_problem_id
+from utils.problem_stream import ProblemStreamParser, READ_CHUNK_SIZE
+
+
+def solved_entry(submission):
+    """(submission id, packed problem id if accepted else None): all a history load keeps"""
+    problem = submission.get("problem", {})
+    if submission.get("verdict") == "OK" and problem.get("index"):
+        return submission["id"], pack_problem_id(problem.get("contestId"), problem["index"])
+    return submission["id"], None
+
+
+class SubmissionStreamParser(ProblemStreamParser):
+    """Incremental parser for a user.status response body.
+
+    Each entry of result is decoded on its own and reduced to a
+    solved_entry, so a heavy user's multi-megabyte history is never held
+    (or parsed in one go) at once.
+    """
+
+    _KEY = '"result"'
+    _slim = staticmethod(solved_entry)
+
+
+async def read_solved(response):
+    """Stream a user.status response down to (highest submission id, packed ids of solved problems).
+
+    Returns None if the body had no complete result array (e.g. a FAILED status).
+    """
+    parser = SubmissionStreamParser()
+    last_id = 0
+    solved = set()
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        for sub_id, packed in parser.feed(chunk):
+            last_id = max(last_id, sub_id)
+            if packed is not None:
+                solved.add(packed)
+    return (last_id, solved) if parser.done else None
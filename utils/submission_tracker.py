@@ -0,0 +1,173 @@
+import time
+from collections import OrderedDict
+from utils.problem_record import pack_problem_id
+
+
+class _HandleState:
+    """What has been seen of one handle's submissions so far"""
+    __slots__ = ("last_id", "first_ac", "compilation_errors", "solved", "full_history", "synced_at")
+
+    def __init__(self):
+        self.last_id = 0                  # watermark: highest submission id seen
+        self.first_ac = {}                # (contestId, index) -> {"id", "creationTimeSeconds"} of the earliest OK
+        self.compilation_errors = set()   # (contestId, index)
+        self.solved = set()               # pack_problem_id of every accepted problem seen
+        self.full_history = False         # solved covers the whole history, not just recent syncs
+        self.synced_at = None             # clock() when the last complete sync or history read started
+
+
+class SubmissionTracker:
+    """Incremental per-handle view of user.status.
+
+    The first sync of a handle reads its latest `initial_count` submissions.
+    Later syncs only read what is newer than the watermark: a small page
+    first, doubling the page size until a page reaches already-seen ids.
+    Nothing is missed even if many submissions were made between checks.
+
+    load_history() reads a handle's whole history once, for its solved
+    set; sync() keeps that set current from then on.
+
+    `fetch_page(handle, start, count)` returns user.status results
+    (newest first), or None if the request failed. `fetch_history(handle)`
+    returns (highest submission id, packed ids of solved problems) for
+    the whole history, or None if it failed.
+
+    At most `max_handles` handles are tracked; the least recently used
+    one is forgotten and starts over with a first sync if seen again.
+    """
+
+    def __init__(self, fetch_page, fetch_history, initial_count=50, page_size=10, max_page_size=1000,
+                 max_handles=500, clock=time.monotonic):
+        self._fetch_page = fetch_page
+        self._fetch_history = fetch_history
+        self.initial_count = initial_count
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.max_handles = max_handles
+        self._clock = clock
+        self._states = OrderedDict()  # lowercased handle -> _HandleState, least recently used first
+
+    def _state(self, handle):
+        state = self._states.get(handle.lower())
+        if state is not None:
+            self._states.move_to_end(handle.lower())
+        return state
+
+    def _store(self, handle, state):
+        self._states[handle.lower()] = state
+        self._states.move_to_end(handle.lower())
+        while len(self._states) > self.max_handles:
+            self._states.popitem(last=False)
+        return state
+
+    async def sync(self, handle):
+        """Pull submissions newer than the watermark. Returns them newest first."""
+        started = self._clock()
+        state = self._state(handle)
+        first_sync = state is None
+        if first_sync:
+            state = _HandleState()
+
+        start = 1
+        count = self.initial_count if first_sync else self.page_size
+        new = []
+        seen = set()
+        complete = False
+
+        while True:
+            page = await self._fetch_page(handle, start, count)
+            if page is None:
+                break
+
+            fresh = [s for s in page if s["id"] > state.last_id and s["id"] not in seen]
+            new.extend(fresh)
+            seen.update(s["id"] for s in fresh)
+
+            # Done once we hit old ids or the end of history. Submissions made
+            # while paging shift later pages down; `seen` drops the repeats.
+            if first_sync or len(page) < count or any(s["id"] <= state.last_id for s in page):
+                complete = True
+                break
+
+            start += count
+            count = min(count * 2, self.max_page_size)
+
+        if first_sync:
+            # load_history may have stored a state while these pages downloaded
+            state = self._state(handle) or state
+        self._record(state, new)
+        # A failed page leaves a gap below what we got; keep the old
+        # watermark so the next sync reads it again
+        if complete and new:
+            state.last_id = max(state.last_id, max(s["id"] for s in new))
+        if complete:
+            state.synced_at = max(state.synced_at or started, started)
+        if complete or not first_sync:
+            self._store(handle, state)
+        return new
+
+    async def load_history(self, handle):
+        """Read the whole history once so solved() covers it. Returns False if the fetch failed."""
+        if self.has_history(handle):
+            return True
+
+        started = self._clock()
+        history = await self._fetch_history(handle)
+        if history is None:
+            return False
+
+        # Re-read the state: a sync may have run while the history downloaded
+        state = self._state(handle) or self._store(handle, _HandleState())
+        last_id, solved = history
+        # Only the solved set is kept for old submissions; first_ac and
+        # compilation errors still come from syncs, which are what checks read
+        state.solved |= solved
+        state.last_id = max(state.last_id, last_id)
+        state.full_history = True
+        state.synced_at = max(state.synced_at or started, started)
+        return True
+
+    def synced_within(self, handle, seconds):
+        """True if a complete sync or history read of the handle started less than `seconds` ago"""
+        state = self._state(handle)
+        return state is not None and state.synced_at is not None and self._clock() - state.synced_at < seconds
+
+    def has_history(self, handle):
+        """True once load_history has read the handle's whole history"""
+        state = self._state(handle)
+        return state is not None and state.full_history
+
+    @staticmethod
+    def _record(state, submissions):
+        for sub in submissions:
+            problem = sub.get("problem", {})
+            key = (problem.get("contestId"), problem.get("index"))
+            verdict = sub.get("verdict")
+            if verdict == "OK":
+                best = state.first_ac.get(key)
+                if best is None or sub["creationTimeSeconds"] < best["creationTimeSeconds"]:
+                    state.first_ac[key] = {"id": sub["id"], "creationTimeSeconds": sub["creationTimeSeconds"]}
+                if key[1]:
+                    state.solved.add(pack_problem_id(*key))
+            elif verdict == "COMPILATION_ERROR":
+                state.compilation_errors.add(key)
+
+    def first_ac(self, handle, contest_id, index):
+        """Earliest accepted submission seen for this problem, or None"""
+        state = self._state(handle)
+        if state is None:
+            return None
+        return state.first_ac.get((contest_id, index))
+
+    def has_compilation_error(self, handle, contest_id, index):
+        state = self._state(handle)
+        return state is not None and (contest_id, index) in state.compilation_errors
+
+    def solved(self, handle):
+        """Packed ids of the problems the handle is known to have solved (do not modify)"""
+        state = self._state(handle)
+        return state.solved if state else frozenset()
+
+    def watermark(self, handle):
+        state = self._states.get(handle.lower())
+        return state.last_id if state else None
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from typing import FrozenSet, Tuple
+
+TAG_SYNTAX = "comma-separated tags, `|` for either, `!` to exclude, `_` for spaces (e.g. `dp,!greedy` or `graphs|trees`)"
+
+
+@dataclass(frozen=True)
+class TagQuery:
+    """A tag filter: every clause must hold.
+
+    A clause matches problems with any of its tags, or, when negated,
+    problems with none of them.
+    """
+    clauses: Tuple[Tuple[bool, FrozenSet[str]], ...]  # (negated, tags)
+
+    def __str__(self):
+        return ",".join(
+            ("!" if negated else "") + "|".join(sorted(tag.replace(" ", "_") for tag in tags))
+            for negated, tags in self.clauses
+        )
+
+
+def parse_tags(text):
+    """Parse a filter like `dp,!greedy,graphs|trees` into a TagQuery.
+
+    Returns None for empty text and raises ValueError on a malformed filter.
+    """
+    if not text or not text.strip():
+        return None
+
+    clauses = []
+    for raw in text.split(","):
+        raw = raw.strip().lower()
+        negated = raw.startswith("!")
+        if negated:
+            raw = raw[1:].strip()
+        tags = frozenset(t.strip().replace("_", " ") for t in raw.split("|"))
+        if not raw or "" in tags:
+            raise ValueError(f"Invalid tag filter `{text}`: use {TAG_SYNTAX}")
+        clauses.append((negated, tags))
+    return TagQuery(tuple(clauses))
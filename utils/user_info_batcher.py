@@ -0,0 +1,97 @@
+import asyncio
+import re
+
+# Codeforces rejects the whole user.info call if one handle is unknown
+_UNKNOWN_HANDLE = re.compile(r"User with handle (\S+) not found")
+
+
+class UserInfoBatcher:
+    """Coalesces user.info lookups made within a short window into one call.
+
+    `fetch_batch(handles)` sends `user.info?handles=a;b;c` and returns the
+    Codeforces response dict (or None on failure). Each `get(handle)` caller
+    receives that handle's user dict, or None if it is unknown.
+    """
+
+    def __init__(self, fetch_batch, window=0.05, max_batch=100):
+        self._fetch_batch = fetch_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}      # lowercased handle -> (handle, [futures])
+        self._timer = None
+        self._tasks = set()     # strong refs to in-progress flushes
+        self.calls = 0          # user.info requests actually sent
+        self.lookups = 0        # get() calls served
+
+    async def get(self, handle):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.lookups += 1
+        self._pending.setdefault(handle.lower(), (handle, []))[1].append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._resolve(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch):
+        try:
+            users = await self._lookup([handle for handle, _ in batch.values()])
+        except Exception as exc:
+            for _, futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+
+        for key, (_, futures) in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(users.get(key))
+
+    async def _lookup(self, handles):
+        """Return {lowercased handle: user dict}, retrying without unknown handles"""
+        users = {}
+        while handles:
+            self.calls += 1
+            data = await self._fetch_batch(handles)
+            if not data:
+                break
+
+            if data.get("status") == "OK":
+                # Results come back in request order; handles may differ in case
+                for handle, user in zip(handles, data["result"]):
+                    users[handle.lower()] = user
+                break
+
+            match = _UNKNOWN_HANDLE.search(data.get("comment", ""))
+            if not match:
+                break
+            unknown = match.group(1).lower()
+            remaining = [h for h in handles if h.lower() != unknown]
+            if len(remaining) == len(handles):
+                break
+            handles = remaining
+
+        return users
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "calls": self.calls,
+            "pending": len(self._pending),
+        }